@@ -1,8 +1,27 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+import orjson
+from fastapi import Depends, FastAPI, APIRouter, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from requests.exceptions import Timeout
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from httpx import TimeoutException
 
-from app.schemas.schemas import ExtractRequest
+from app.clients.clients import clients
+from app.clients.consents import consents
+from app.core.encrypted_cache import EncryptedCache, cache
+from app.core.http_client import http_pool
+from app.core.metrics import metrics
+from app.core.rate_limiter import governors
+from app.core.resilience import circuit_breakers, retry_budget
+from app.core.responses import ModelJSONResponse
+from app.core.settings import settings
+from app.extractors.extractor import extractor
+from app.extractors.incremental import incremental_sync
+from app.normalizers.normalizer import normalizer
+from app.schemas.schemas import BatchExtractRequest, ExtractRequest
+from app.services.batch_service import BatchExtractFinancialDataService
+from app.services.jobs import SUCCEEDED, FAILED, job_queue
 from app.services.service import ExtractFinancialDataService
 from app.core.error_handlers import (
     http_exception_handler,
@@ -12,20 +31,121 @@ from app.core.error_handlers import (
     value_error_handler,
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importing the app builds nothing; the services are built here (and a
+    # missing key fails startup) so the first request doesn't pay for it
+    for service in (cache, clients, consents, extractor, incremental_sync, normalizer):
+        service.get()
+    yield
+    await job_queue.stop()
+    await http_pool.aclose()
+
+
 router = APIRouter()
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_exception_handler(HTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError, request_validation_error_handler)
-app.add_exception_handler(Timeout, timeout_error_handler)
+app.add_exception_handler(TimeoutException, timeout_error_handler)
 app.add_exception_handler(Exception, generic_error_handler)
 app.add_exception_handler(ValueError, value_error_handler)
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def encode_ndjson(records: AsyncIterator[Dict]):
+    async for record in records:
+        yield orjson.dumps(record) + b"\n"
+
+
+@router.post("/extract-financial-data", response_class=ModelJSONResponse)
+async def extract_financial_data(payload: ExtractRequest, request: Request):
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return await stream_financial_data(payload)
+
+    force_refresh = "no-cache" in request.headers.get("cache-control", "")
+    service = ExtractFinancialDataService(payload)
+    response = await service.extract_data(force_refresh=force_refresh)
+
+    headers = {}
+    server_timing = service.timings.server_timing()
+    if settings.server_timing_enabled and server_timing:
+        headers["Server-Timing"] = server_timing
+    return ModelJSONResponse(
+        response, headers=headers, exclude=payload.response_exclude()
+    )
+
+
+@router.post("/extract-financial-data/stream")
+async def stream_financial_data(payload: ExtractRequest):
+    records = await ExtractFinancialDataService(payload).stream_data()
+    return StreamingResponse(encode_ndjson(records), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post("/extract-financial-data/batch", response_class=ModelJSONResponse)
+async def batch_extract_financial_data(payload: BatchExtractRequest):
+    response = await BatchExtractFinancialDataService(payload).extract_data()
+    # Results come back in the order of the expanded requests
+    exclude = {
+        index: {"response": data_source.response_exclude()}
+        for index, data_source in enumerate(payload.expand())
+        if data_source.fields is not None
+    }
+    return ModelJSONResponse(
+        response, exclude={"results": exclude} if exclude else None
+    )
+
+
+@router.post("/extract-financial-data/jobs", status_code=202)
+async def submit_extraction_job(payload: ExtractRequest):
+    job = job_queue.submit(payload)
+    return job.describe()
+
+
+@router.get("/extract-financial-data/jobs/{job_id}")
+async def get_extraction_job(job_id: str):
+    return job_queue.get(job_id).describe()
+
+
+@router.get("/extract-financial-data/jobs/{job_id}/result")
+async def get_extraction_job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job.status == SUCCEEDED:
+        return ModelJSONResponse(job.result, exclude=job.data_source.response_exclude())
+    if job.status == FAILED:
+        return JSONResponse(
+            status_code=job.error.status_code,
+            content={"message": job.error.message, "job_id": job.id},
+        )
+    return JSONResponse(status_code=202, content=job.describe().model_dump())
+
+
+@router.get("/http-pool/stats")
+async def http_pool_stats():
+    return http_pool.stats()
+
+
+@router.get("/resilience/stats")
+async def resilience_stats():
+    return {
+        "retry_budget": retry_budget.stats(),
+        "circuit_breakers": circuit_breakers.stats(),
+        "governors": governors.stats(),
+    }
+
+
+@router.get("/cache/stats")
+async def cache_stats(encrypted_cache: EncryptedCache = Depends(cache.get)):
+    return encrypted_cache.stats()
+
 
-@router.post("/extract-financial-data")
-def extract_financial_data(payload: ExtractRequest):
-    response = ExtractFinancialDataService(payload).extract_data()
-    return response
+@router.get("/metrics")
+async def prometheus_metrics(encrypted_cache: EncryptedCache = Depends(cache.get)):
+    return PlainTextResponse(
+        metrics.render(encrypted_cache.stats()), media_type="text/plain; version=0.0.4"
+    )
 
 
 app.include_router(router)
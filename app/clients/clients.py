@@ -1,28 +1,43 @@
+from app.clients.listing_index import ListingIndex
+from app.core.encrypted_cache import cache
+from app.core.lazy import Lazy
 from app.core.retry_utils import request_with_retry
-from app.schemas.schemas import ExtractRequest
+from app.core.settings import settings
+from app.schemas.schemas import ExtractRequest, Organization
 
-BASE_URL = "http://localhost:8000"
+BASE_URL = settings.upstream_base_url
 
 
 class Clients:
-    def create_dynamic_client_token(self, data_source: ExtractRequest):
-        payload = data_source.model_dump()
-        payload.pop("user_document_number")
+    def __init__(self):
+        self.index = ListingIndex(
+            "organization_id",
+            settings.listing_index_refresh_s,
+            settings.listing_index_min_refresh_s,
+            cache.cipher,
+        )
+
+    async def create_dynamic_client_token(self, data_source: ExtractRequest):
+        payload = data_source.model_dump(include=set(Organization.model_fields))
 
-        response = request_with_retry(
+        response = await request_with_retry(
             "POST", f"{BASE_URL}/dynamic-client/", json=payload
         )
-        return response.json().get("token")
+        token = response.json().get("token")
 
-    def get_dynamic_client_token(self, organization_id: str):
-        response = request_with_retry("GET", f"{BASE_URL}/dynamic-client/")
+        self.index.add({"organization_id": data_source.organization_id, "token": token})
+        return token
 
-        clients = response.json()
-        for client in clients:
-            if client.get("organization_id") == organization_id:
-                return client.get("token")
+    async def get_dynamic_client_token(self, organization_id: str):
+        client = await self.index.lookup(organization_id, self.__list_clients)
+        if client:
+            return client.get("token")
 
         return None
 
+    async def __list_clients(self):
+        response = await request_with_retry("GET", f"{BASE_URL}/dynamic-client/")
+        return response.json()
+
 
-clients = Clients()
+clients: Lazy[Clients] = Lazy(Clients)
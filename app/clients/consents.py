@@ -1,14 +1,28 @@
+import hashlib
+from functools import partial
+
+from cachetools import LRUCache
+
+from app.clients.listing_index import ListingIndex
+from app.core.encrypted_cache import cache
+from app.core.lazy import Lazy
 from app.core.retry_utils import request_with_retry
+from app.core.settings import settings
 
-BASE_URL = "http://localhost:8000"
+BASE_URL = settings.upstream_base_url
 
 
 class Consents:
-    def create_consent(self, user_document_number: str, token: str):
+    def __init__(self):
+        # The consent listing is scoped to the dynamic client token, keyed
+        # here by its hash so the token itself isn't kept around
+        self.indexes = LRUCache(maxsize=100)
+
+    async def create_consent(self, user_document_number: str, token: str):
         headers = {"Authorization": f"{token}"}
         payload = {"user_document_number": user_document_number}
 
-        response = request_with_retry(
+        response = await request_with_retry(
             "POST", f"{BASE_URL}/consent/", headers=headers, json=payload
         )
 
@@ -16,20 +30,42 @@ class Consents:
         if consent["status"] != "APPROVED":
             raise Exception("Consent not approved")
 
+        self.__index(token).add(
+            {"user_document_number": user_document_number, **consent}
+        )
         return consent.get("token"), consent.get("id")
 
-    def get_consent(self, user_document_number: str, token: str):
-        headers = {"Authorization": f"{token}"}
-        response = request_with_retry("GET", f"{BASE_URL}/consent/", headers=headers)
+    async def get_consent(self, user_document_number: str, token: str):
+        consent = await self.__index(token).lookup(
+            user_document_number, partial(self.__list_consents, token)
+        )
 
-        consents = response.json()
-        for consent in consents:
-            if consent.get("user_document_number") == user_document_number:
-                if consent.get("status") != "APPROVED":
-                    raise Exception("Consent not approved")
-                return consent.get("token"), consent.get("id")
+        if consent:
+            if consent.get("status") != "APPROVED":
+                raise Exception("Consent not approved")
+            return consent.get("token"), consent.get("id")
 
         return None, None
 
+    def __index(self, token: str) -> ListingIndex:
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        index = self.indexes.get(token_hash)
+        if index is None:
+            index = ListingIndex(
+                "user_document_number",
+                settings.listing_index_refresh_s,
+                settings.listing_index_min_refresh_s,
+                cache.cipher,
+            )
+            self.indexes[token_hash] = index
+        return index
+
+    async def __list_consents(self, token: str):
+        headers = {"Authorization": f"{token}"}
+        response = await request_with_retry(
+            "GET", f"{BASE_URL}/consent/", headers=headers
+        )
+        return response.json()
+
 
-consents = Consents()
+consents: Lazy[Consents] = Lazy(Consents)
@@ -0,0 +1,86 @@
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import orjson
+
+from app.core.ciphers import Cipher
+from app.core.single_flight import SingleFlight
+
+
+class ListingIndex:
+    """Local dict index over an upstream collection that only supports listing.
+
+    The whole collection is listed once and indexed by ``key_field``. After
+    that a lookup is a dict access; the listing is fetched again only when the
+    index is older than ``refresh_interval_s``, or on a miss when the last
+    refresh is at least ``min_refresh_interval_s`` old (the entry may have
+    been created by another worker). Entries we create ourselves are added
+    with ``add`` so they never need a refresh to be found.
+
+    Entries hold tokens, so they are kept encrypted with ``cipher`` and only
+    decrypted for the entry a lookup returns.
+    """
+
+    def __init__(
+        self,
+        key_field: str,
+        refresh_interval_s: float,
+        min_refresh_interval_s: float,
+        cipher: Cipher,
+    ):
+        self.key_field = key_field
+        self.refresh_interval_s = refresh_interval_s
+        self.min_refresh_interval_s = min_refresh_interval_s
+        self.cipher = cipher
+        self.refreshes = 0
+        self._entries: Dict[str, bytes] = {}
+        # Entries added while a refresh is in flight, kept over its listing
+        self._added: Optional[Dict[str, bytes]] = None
+        self._loaded_at: Optional[float] = None
+        self._single_flight = SingleFlight()
+
+    async def lookup(
+        self, key: str, load: Callable[[], Awaitable[List[Dict]]]
+    ) -> Optional[Dict]:
+        age = self.__age()
+        if age is None or age >= self.refresh_interval_s:
+            await self.__refresh(load)
+        elif key not in self._entries and age >= self.min_refresh_interval_s:
+            await self.__refresh(load)
+
+        encrypted = self._entries.get(key)
+        if encrypted is None:
+            return None
+        return orjson.loads(self.cipher.decrypt(encrypted))
+
+    def add(self, entry: Dict):
+        key = entry.get(self.key_field)
+        encrypted = self.cipher.encrypt(orjson.dumps(entry))
+        self._entries[key] = encrypted
+        if self._added is not None:
+            self._added[key] = encrypted
+
+    def __age(self) -> Optional[float]:
+        if self._loaded_at is None:
+            return None
+        return time.monotonic() - self._loaded_at
+
+    async def __refresh(self, load: Callable[[], Awaitable[List[Dict]]]):
+        async def refresh():
+            self._added = {}
+            try:
+                listing = await load()
+                entries = {}
+                for entry in listing:
+                    # Keep the first match, as the old linear scan did
+                    key = entry.get(self.key_field)
+                    if key not in entries:
+                        entries[key] = self.cipher.encrypt(orjson.dumps(entry))
+                entries.update(self._added)
+                self._entries = entries
+            finally:
+                self._added = None
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+
+        await self._single_flight.do("refresh", refresh)
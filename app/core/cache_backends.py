@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from cachetools import TTLCache
+
+from app.core.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Byte-oriented key/value store behind ``EncryptedCache``.
+
+    Values are already encrypted by the caller, so backends never see
+    plaintext. Every backend counts hits, misses and evictions. Coroutines
+    use the ``aget``/``aset``/``adelete`` variants, which run ``blocking``
+    backends in a worker thread instead of stalling the event loop.
+    """
+
+    # Whether the sync methods do file or network I/O
+    blocking = False
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        record_cache_lookup(self.namespace, value is not None)
+        return value
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await self._run(self.get, key)
+
+    async def aset(self, key: str, value: bytes):
+        await self._run(self.set, key, value)
+
+    async def adelete(self, key: str):
+        await self._run(self.delete, key)
+
+    async def _run(self, method, *args):
+        if not self.blocking:
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    def stats(self) -> Dict:
+        return {
+            "backend": type(self).__name__,
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes): ...
+
+    @abstractmethod
+    def delete(self, key: str): ...
+
+    @abstractmethod
+    def clear(self): ...
+
+
+class _CountingTTLCache(TTLCache):
+    def __init__(self, backend: "InMemoryBackend", maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.backend = backend
+
+    def popitem(self):
+        # Called by cachetools when making room for a new entry
+        self.backend.evictions += 1
+        return super().popitem()
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.backend.evictions += len(expired)
+        return expired
+
+
+class InMemoryBackend(CacheBackend):
+    """Per-process ``TTLCache``; fastest, but each worker has its own copy."""
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float):
+        super().__init__(namespace, maxsize, ttl)
+        self._cache = _CountingTTLCache(self, maxsize, ttl)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: bytes):
+        self._cache[key] = value
+
+    def delete(self, key: str):
+        self._cache.pop(key, None)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class FileBackend(CacheBackend):
+    """SQLite file shared by every worker on the same host."""
+
+    blocking = True
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float, path: str):
+        super().__init__(namespace, maxsize, ttl)
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                "expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_by_expiry "
+                "ON cache_entries (namespace, expires_at)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries "
+                "WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row and row[1] <= time.time():
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                self.evictions += 1
+                return None
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?)",
+                (self.namespace, key, value, time.time() + self.ttl),
+            )
+            # Trim to maxsize, dropping the entries closest to expiring
+            evicted = conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM cache_entries WHERE namespace = ? "
+                "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.maxsize),
+            ).rowcount
+            self.evictions += max(evicted, 0)
+
+    def delete(self, key: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            )
+
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP client for Redis (or anything speaking its protocol).
+
+    Only ``GET``, ``SET ... PX``, ``DEL`` and ``SCAN`` are used,
+    so no client library is needed. TTL is enforced by the server and
+    ``maxsize`` is left to its ``maxmemory`` policy, so server-side
+    evictions are not counted here. An unreachable or failing server is
+    logged and treated as a miss, so a cache outage never fails an
+    extraction.
+    """
+
+    blocking = True
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float, url: str):
+        super().__init__(namespace, maxsize, ttl)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+
+    def _key(self, key: str) -> str:
+        return f"ofda:{self.namespace}:{key}"
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=5)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.db:
+            self._send("SELECT", str(self.db))
+
+    def _command(self, *args):
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._send(*args)
+            except (OSError, ConnectionError):
+                self._close()
+                raise
+
+    def _close(self):
+        for stream in (self._reader, self._sock):
+            if stream is not None:
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+        self._sock = None
+        self._reader = None
+
+    def _try_command(self, *args):
+        try:
+            return self._command(*args)
+        except (OSError, ConnectionError) as err:
+            logger.warning("Cache server %s failed: %s", args[0], err)
+            return None
+
+    def _send(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by cache server.")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise ConnectionError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from cache server: {line!r}")
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self._try_command("GET", self._key(key))
+
+    def set(self, key: str, value: bytes):
+        self._try_command("SET", self._key(key), value, "PX", int(self.ttl * 1000))
+
+    def delete(self, key: str):
+        self._try_command("DEL", self._key(key))
+
+    def clear(self):
+        cursor = "0"
+        while True:
+            reply = self._try_command(
+                "SCAN", cursor, "MATCH", self._key("*"), "COUNT", 1000
+            )
+            if reply is None:
+                return
+            cursor, keys = reply
+            cursor = cursor.decode() if isinstance(cursor, bytes) else cursor
+            if keys:
+                self._try_command("DEL", *keys)
+            if cursor == "0":
+                return
+
+
+def create_backend(
+    kind: str, namespace: str, maxsize: int, ttl: float, file_path: str, redis_url: str
+) -> CacheBackend:
+    if kind == "memory":
+        return InMemoryBackend(namespace, maxsize, ttl)
+    if kind == "file":
+        return FileBackend(namespace, maxsize, ttl, file_path)
+    if kind == "redis":
+        return RedisBackend(namespace, maxsize, ttl, redis_url)
+    raise ValueError(f"Unknown cache backend: {kind}")
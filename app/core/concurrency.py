@@ -0,0 +1,18 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+
+async def gather_or_cancel(*factories: Callable[[], Awaitable]) -> List:
+    """Run every factory concurrently and return the results in input order.
+
+    On the first failure the remaining tasks are cancelled and the error is
+    re-raised, matching what a sequential loop would have done.
+    """
+    tasks = [asyncio.ensure_future(factory()) for factory in factories]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -1,26 +1,65 @@
-import os
-from cachetools import TTLCache
-from cryptography.fernet import Fernet
+import time
+from typing import Dict, Optional, Tuple
+
 from dotenv import load_dotenv
 
+from app.core.cache_backends import create_backend
+from app.core.ciphers import load_cipher
+from app.core.lazy import Lazy
+from app.core.local_store import LocalStore
+from app.core.settings import settings
+
 
 class EncryptedCache:
     def __init__(self):
         load_dotenv()
-        self.dynamic_client_cache = TTLCache(maxsize=100, ttl=86400)  # 24h
-        self.consent_cache = TTLCache(maxsize=100, ttl=3600)  # 1h
+        self.dynamic_client_cache = self.__backend(
+            "dynamic_client",
+            settings.dynamic_client_cache_maxsize,
+            settings.dynamic_client_cache_ttl_s,
+        )
+        self.consent_cache = self.__backend(
+            "consent", settings.consent_cache_maxsize, settings.consent_cache_ttl_s
+        )
+        self.extraction_cache = self.__backend(
+            "extraction",
+            settings.extraction_cache_maxsize,
+            settings.extraction_cache_ttl_s,
+        )
+        self.partial_result_cache = self.__backend(
+            "partial_result",
+            settings.partial_result_maxsize,
+            settings.partial_result_ttl_s,
+        )
+        self.transaction_history_cache = self.__backend(
+            "transaction_history",
+            settings.transaction_history_maxsize,
+            settings.transaction_history_ttl_s,
+        )
+
+        self.cipher = load_cipher(settings.cache_cipher)
+
+        self.store = None
+        if settings.local_store_path:
+            self.store = LocalStore(settings.local_store_path, self.cipher)
 
-        key = os.getenv("CRYPTOGRAPHY_KEY")
-        if not key:
-            raise ValueError("CRYPTOGRAPHY_KEY environment variable not set.")
-        self.cipher = Fernet(key)
+    @staticmethod
+    def __backend(namespace: str, maxsize: int, ttl: float):
+        return create_backend(
+            settings.cache_backend,
+            namespace,
+            maxsize,
+            ttl,
+            settings.cache_file_path,
+            settings.cache_redis_url,
+        )
 
-    def set_dynamic_client_token(self, organization_id: str, token: str):
+    async def set_dynamic_client_token(self, organization_id: str, token: str):
         encrypted_token = self.cipher.encrypt(token.encode())
-        self.dynamic_client_cache[organization_id] = encrypted_token
+        await self.dynamic_client_cache.aset(organization_id, encrypted_token)
 
-    def get_dynamic_client_token(self, organization_id: str):
-        encrypted_token = self.dynamic_client_cache.get(organization_id)
+    async def get_dynamic_client_token(self, organization_id: str):
+        encrypted_token = await self.dynamic_client_cache.aget(organization_id)
         if not encrypted_token:
             return None
         try:
@@ -28,21 +67,109 @@ class EncryptedCache:
         except Exception:
             return None
 
-    def set_consent(self, user_document: str, token: str, consent_id: str):
-        encrypted_token = self.cipher.encrypt(token.encode())
-        encrypted_consent_id = self.cipher.encrypt(consent_id.encode())
-        self.consent_cache[user_document] = (encrypted_token, encrypted_consent_id)
+    async def set_consent(self, user_document: str, token: str, consent_id: str):
+        await self.consent_cache.aset(
+            user_document, self.__encrypt_consent(token, consent_id)
+        )
 
-    def get_consent(self, user_document: str):
-        encrypted_pair = self.consent_cache.get(user_document)
-        if not encrypted_pair:
+    async def get_consent(self, user_document: str):
+        encrypted_consent = await self.consent_cache.aget(user_document)
+        if not encrypted_consent:
             return None, None
         try:
-            token = self.cipher.decrypt(encrypted_pair[0]).decode()
-            consent_id = self.cipher.decrypt(encrypted_pair[1]).decode()
+            # One blob, so a lookup costs a single decrypt
+            token, consent_id = (
+                self.cipher.decrypt(encrypted_consent).decode().split("\n", 1)
+            )
             return token, consent_id
         except Exception:
             return None, None
 
+    async def set_extraction(
+        self, organization_id: str, user_document: str, payload: str
+    ):
+        encrypted_payload = self.cipher.encrypt(payload.encode())
+        stored_at = repr(time.time()).encode()
+        await self.extraction_cache.aset(
+            self.__extraction_key(organization_id, user_document),
+            stored_at + b"\n" + encrypted_payload,
+        )
+
+    async def get_extraction(
+        self, organization_id: str, user_document: str
+    ) -> Tuple[Optional[str], Optional[int]]:
+        """Return the cached extraction payload and its age in milliseconds."""
+        entry = await self.extraction_cache.aget(
+            self.__extraction_key(organization_id, user_document)
+        )
+        if not entry:
+            return None, None
+        try:
+            stored_at, encrypted_payload = entry.split(b"\n", 1)
+            payload = self.cipher.decrypt(encrypted_payload).decode()
+        except Exception:
+            return None, None
+        return payload, int((time.time() - float(stored_at)) * 1000)
+
+    async def set_partial_result(
+        self, organization_id: str, user_document: str, payload: str
+    ):
+        await self.partial_result_cache.aset(
+            self.__extraction_key(organization_id, user_document),
+            self.cipher.encrypt(payload.encode()),
+        )
+
+    async def get_partial_result(
+        self, organization_id: str, user_document: str
+    ) -> Optional[str]:
+        encrypted_payload = await self.partial_result_cache.aget(
+            self.__extraction_key(organization_id, user_document)
+        )
+        if not encrypted_payload:
+            return None
+        try:
+            return self.cipher.decrypt(encrypted_payload).decode()
+        except Exception:
+            return None
+
+    async def clear_partial_result(self, organization_id: str, user_document: str):
+        await self.partial_result_cache.adelete(
+            self.__extraction_key(organization_id, user_document)
+        )
+
+    async def set_transaction_history(self, account_id: str, payload: str):
+        await self.transaction_history_cache.aset(
+            account_id, self.cipher.encrypt(payload.encode())
+        )
+
+    async def get_transaction_history(self, account_id: str) -> Optional[str]:
+        encrypted_payload = await self.transaction_history_cache.aget(account_id)
+        if not encrypted_payload:
+            return None
+        try:
+            return self.cipher.decrypt(encrypted_payload).decode()
+        except Exception:
+            return None
+
+    def stats(self) -> Dict:
+        return {
+            backend.namespace: backend.stats()
+            for backend in (
+                self.dynamic_client_cache,
+                self.consent_cache,
+                self.extraction_cache,
+                self.partial_result_cache,
+                self.transaction_history_cache,
+            )
+        }
+
+    @staticmethod
+    def __extraction_key(organization_id: str, user_document: str) -> str:
+        return f"{organization_id}:{user_document}"
+
+    def __encrypt_consent(self, token: str, consent_id: str) -> bytes:
+        # Tokens and ids never contain a newline
+        return self.cipher.encrypt(f"{token}\n{consent_id}".encode())
+
 
-cache = EncryptedCache()
+cache: Lazy[EncryptedCache] = Lazy(EncryptedCache)
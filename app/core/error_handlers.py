@@ -1,7 +1,8 @@
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
-from requests.exceptions import Timeout
+from httpx import TimeoutException
 from fastapi.exceptions import RequestValidationError
+from typing import Tuple
 
 
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -18,6 +19,11 @@ async def http_exception_handler(request: Request, exc: HTTPException):
                 "detail": exc.detail,
             },
         )
+    elif exc.status_code == 429:
+        return JSONResponse(
+            status_code=429,
+            content={"message": "Too many requests.", "detail": exc.detail},
+        )
     else:
         return JSONResponse(
             status_code=502,
@@ -39,7 +45,7 @@ async def request_validation_error_handler(
     )
 
 
-async def timeout_error_handler(request: Request, exc: Timeout):
+async def timeout_error_handler(request: Request, exc: TimeoutException):
     return JSONResponse(
         status_code=status.HTTP_504_GATEWAY_TIMEOUT,
         content={"message": "Timeout: external API did not respond in time."},
@@ -61,3 +67,19 @@ async def value_error_handler(request: Request, exc: ValueError):
         },
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
     )
+
+
+def describe_error(exc: Exception) -> Tuple[int, str]:
+    """Status code and message the handlers above would answer with, for
+    places that report errors in a body instead of raising them."""
+    if isinstance(exc, HTTPException):
+        if exc.status_code == 404:
+            return 404, "Resource not found."
+        if exc.status_code == 422:
+            return 422, "Validation error when sending data to external API."
+        return 502, "External service error. Please try again or contact support."
+    if isinstance(exc, TimeoutException):
+        return 504, "Timeout: external API did not respond in time."
+    if isinstance(exc, ValueError):
+        return 500, "Internal configuration error."
+    return 502, "An unexpected error occurred. Please try again later."
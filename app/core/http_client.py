@@ -0,0 +1,81 @@
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.settings import settings
+
+
+class HttpClientPool:
+    """Shared keep-alive client for every upstream call.
+
+    The underlying ``httpx.AsyncClient`` is created on first use and reused
+    until ``aclose`` is called (on app shutdown), so pages of ``/account/``
+    and ``/transactions/`` ride the same TCP connections.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_in_flight: Dict[str, int] = {}
+        self.total_requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_s,
+            )
+            timeout = httpx.Timeout(
+                settings.http_read_timeout_s,
+                connect=settings.http_connect_timeout_s,
+            )
+            transport = httpx.AsyncHTTPTransport(limits=limits)
+            self._client = httpx.AsyncClient(transport=transport, timeout=timeout)
+        return self._client
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(
+                settings.http_max_connections_per_host
+            )
+        return self._host_semaphores[host]
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        client = self._get_client()
+        host = httpx.URL(url).netloc.decode()
+        async with self._host_semaphore(host):
+            self.total_requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self._host_in_flight[host] = self._host_in_flight.get(host, 0) + 1
+            try:
+                return await client.request(method, url, **kwargs)
+            finally:
+                self.in_flight -= 1
+                self._host_in_flight[host] -= 1
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._host_semaphores = {}
+        self._host_in_flight = {}
+
+    def stats(self) -> Dict:
+        # Counted here rather than read from httpx's private connection pool
+        return {
+            "max_connections": settings.http_max_connections,
+            "max_keepalive_connections": settings.http_max_keepalive_connections,
+            "max_connections_per_host": settings.http_max_connections_per_host,
+            "total_requests": self.total_requests,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "in_flight_per_host": dict(self._host_in_flight),
+        }
+
+
+http_pool = HttpClientPool()
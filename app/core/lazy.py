@@ -0,0 +1,34 @@
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """Module-level singleton that is built on first use instead of at import.
+
+    Attribute access is forwarded to the instance, so call sites keep using
+    the module attribute (``cache.get_consent(...)``). ``get`` returns the
+    instance itself, for ``Depends`` and for building it up front in the
+    app lifespan.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        if self._instance is None:
+            # Store calls run in worker threads
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
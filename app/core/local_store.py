@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+from app.core.ciphers import Cipher
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    organization_id TEXT NOT NULL,
+    user_document TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (organization_id, user_document)
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    organization_id TEXT NOT NULL,
+    user_document TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (organization_id, user_document, account_id)
+);
+CREATE INDEX IF NOT EXISTS accounts_by_account_id ON accounts (account_id);
+CREATE TABLE IF NOT EXISTS transactions (
+    account_id TEXT NOT NULL,
+    transaction_id TEXT NOT NULL,
+    transaction_date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (account_id, transaction_id)
+);
+DROP INDEX IF EXISTS transactions_by_account_date;
+"""
+
+
+class LocalStore:
+    """SQLite-backed store of extracted accounts and transactions, shared by
+    every worker on the host.
+
+    Tokens and consents are not kept here: ``CACHE_BACKEND=file`` already
+    shares them between workers.
+
+    Payload columns are encrypted with the same cipher as
+    ``EncryptedCache``; only the lookup columns (organization, user document,
+    account id, transaction id and date) are kept in clear text. A connection is opened per operation, which keeps the store
+    safe to call from worker threads and from several processes (WAL mode).
+    """
+
+    def __init__(self, path: str, cipher: Cipher):
+        self.path = path
+        self.cipher = cipher
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+
+    def _encrypt(self, value) -> bytes:
+        return self.cipher.encrypt(orjson.dumps(value))
+
+    def _decrypt(self, payload: bytes):
+        return orjson.loads(self.cipher.decrypt(payload))
+
+    def save_extraction(self, organization_id: str, user_document: str, response: Dict):
+        """Replace the stored accounts and transactions for one user."""
+        header = {key: value for key, value in response.items() if key != "accounts"}
+        key = (organization_id, user_document)
+
+        with self._connect() as conn:
+            account_ids = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT account_id FROM accounts "
+                    "WHERE organization_id = ? AND user_document = ?",
+                    key,
+                )
+            ]
+            conn.executemany(
+                "DELETE FROM transactions WHERE account_id = ?",
+                [(account_id,) for account_id in account_ids],
+            )
+            conn.execute(
+                "DELETE FROM accounts WHERE organization_id = ? AND user_document = ?",
+                key,
+            )
+
+            for position, account in enumerate(response["accounts"]):
+                transactions = account["transactions"]
+                account = {k: v for k, v in account.items() if k != "transactions"}
+                conn.execute(
+                    "INSERT INTO accounts VALUES (?, ?, ?, ?, ?)",
+                    (*key, account["account_id"], position, self._encrypt(account)),
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            account["account_id"],
+                            transaction["transaction_id"],
+                            transaction["date"] or "",
+                            tx_position,
+                            self._encrypt(transaction),
+                        )
+                        for tx_position, transaction in enumerate(transactions)
+                    ],
+                )
+
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+                (*key, self._encrypt(header), time.time()),
+            )
+
+    def load_extraction(
+        self, organization_id: str, user_document: str, max_age_s: float
+    ) -> Tuple[Optional[Dict], Optional[int]]:
+        """Rebuild a stored extraction and return it with its age in ms."""
+        key = (organization_id, user_document)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, stored_at FROM extractions "
+                "WHERE organization_id = ? AND user_document = ? AND stored_at > ?",
+                (*key, time.time() - max_age_s),
+            ).fetchone()
+            if not row:
+                return None, None
+
+            try:
+                response = self._decrypt(row[0])
+                response["accounts"] = [
+                    self._decrypt(payload)
+                    for (payload,) in conn.execute(
+                        "SELECT payload FROM accounts "
+                        "WHERE organization_id = ? AND user_document = ? "
+                        "ORDER BY position",
+                        key,
+                    )
+                ]
+                for account in response["accounts"]:
+                    account["transactions"] = self._load_transactions(
+                        conn, account["account_id"]
+                    )
+            except Exception:
+                return None, None
+
+        return response, int((time.time() - row[1]) * 1000)
+
+    def _load_transactions(
+        self, conn: sqlite3.Connection, account_id: str
+    ) -> List[Dict]:
+        rows = conn.execute(
+            "SELECT payload FROM transactions WHERE account_id = ? ORDER BY position",
+            (account_id,),
+        ).fetchall()
+        return [self._decrypt(payload) for (payload,) in rows]
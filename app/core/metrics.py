@@ -0,0 +1,181 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.schemas.schemas import (
+    CacheLookups,
+    RouteTiming,
+    StageTiming,
+    TimingBreakdown,
+)
+
+PREFIX = "ofda"
+
+current_timings: ContextVar[Optional["Timings"]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+class Timings:
+    """Stage durations, upstream calls and cache lookups of one extraction.
+
+    Stages of concurrent account fetches (balances, transactions,
+    normalization) add up across accounts, so they can exceed the total.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, StageTiming] = {}
+        self.upstream: Dict[str, RouteTiming] = {}
+        self.cache: Dict[str, CacheLookups] = {}
+
+    def add_stage(self, stage: str, seconds: float):
+        timing = self.stages.setdefault(stage, StageTiming())
+        timing.count += 1
+        timing.duration_ms += seconds * 1000
+
+    def add_request(self, route: str, seconds: float):
+        timing = self.upstream.setdefault(route, RouteTiming())
+        timing.count += 1
+        timing.duration_ms += seconds * 1000
+
+    def add_retry(self, route: str):
+        self.upstream.setdefault(route, RouteTiming()).retries += 1
+
+    def add_cache_lookup(self, namespace: str, hit: bool):
+        lookups = self.cache.setdefault(namespace, CacheLookups())
+        if hit:
+            lookups.hits += 1
+        else:
+            lookups.misses += 1
+
+    def breakdown(self) -> TimingBreakdown:
+        return TimingBreakdown(
+            stages=self.stages, upstream=self.upstream, cache=self.cache
+        )
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{stage};dur={timing.duration_ms:.1f}"
+            for stage, timing in self.stages.items()
+        )
+
+
+class Metrics:
+    """Process-wide counters rendered in the Prometheus text format."""
+
+    def __init__(self):
+        # label values -> [count, seconds]
+        self.stages: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        self.requests: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.request_durations: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        self.retries: Dict[str, int] = defaultdict(int)
+
+    def observe_stage(self, stage: str, seconds: float):
+        observed = self.stages[stage]
+        observed[0] += 1
+        observed[1] += seconds
+
+    def observe_request(self, route: str, status: str, seconds: float):
+        self.requests[(route, status)] += 1
+        observed = self.request_durations[route]
+        observed[0] += 1
+        observed[1] += seconds
+
+    def observe_retry(self, route: str):
+        self.retries[route] += 1
+
+    def render(self, cache_stats: Dict[str, Dict]) -> str:
+        lines = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        def sample(name: str, labels: Dict[str, str], value: float):
+            rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f"{PREFIX}_{name}{{{rendered}}} {value}")
+
+        family("stage_duration_seconds", "summary", "Time spent per extraction stage.")
+        for stage, (count, seconds) in self.stages.items():
+            sample("stage_duration_seconds_count", {"stage": stage}, count)
+            sample("stage_duration_seconds_sum", {"stage": stage}, seconds)
+
+        family("upstream_requests_total", "counter", "Upstream requests by status.")
+        for (route, status), count in self.requests.items():
+            sample("upstream_requests_total", {"route": route, "status": status}, count)
+
+        family(
+            "upstream_request_duration_seconds",
+            "summary",
+            "Upstream request time per route.",
+        )
+        for route, (count, seconds) in self.request_durations.items():
+            sample("upstream_request_duration_seconds_count", {"route": route}, count)
+            sample("upstream_request_duration_seconds_sum", {"route": route}, seconds)
+
+        family("upstream_retries_total", "counter", "Upstream retries per route.")
+        for route, count in self.retries.items():
+            sample("upstream_retries_total", {"route": route}, count)
+
+        for counter in ("hits", "misses", "evictions"):
+            family(f"cache_{counter}_total", "counter", f"Cache {counter}.")
+            for namespace, stats in cache_stats.items():
+                sample(
+                    f"cache_{counter}_total", {"namespace": namespace}, stats[counter]
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@contextmanager
+def timings_scope(timings: Timings):
+    """Collect into ``timings`` everything measured inside the block (and in
+    tasks it spawns)."""
+    token = current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        current_timings.reset(token)
+
+
+@contextmanager
+def timed(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe_stage(stage, elapsed)
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add_stage(stage, elapsed)
+
+
+def record_upstream_request(route: str, status: str, seconds: float):
+    metrics.observe_request(route, status, seconds)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add_request(route, seconds)
+
+
+def record_retry(route: str):
+    metrics.observe_retry(route)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add_retry(route)
+
+
+def record_cache_lookup(namespace: str, hit: bool):
+    # Process-wide hits and misses are already counted by the backends
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add_cache_lookup(namespace, hit)
+
+
+metrics = Metrics()
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Hashable
+
+from app.core.settings import settings
+
+# Who an upstream call is made for; waiters are served round-robin across
+# these keys so one large extraction can't starve the others
+fair_share_key: ContextVar[Hashable] = ContextVar("fair_share_key", default=None)
+
+
+class RouteGovernor:
+    """Caps requests per second and requests in flight for one upstream route.
+
+    Callers over the in-flight limit queue per fair-share key and slots are
+    handed out round-robin across keys. The rate is a token bucket (burst of
+    one second's worth); a caller admitted ahead of its token sleeps until it
+    is earned. A limit of ``0`` disables that check.
+    """
+
+    def __init__(self, rps: float, max_in_flight: int):
+        self.rps = rps
+        self.max_in_flight = max_in_flight
+        self.burst = max(rps, 1.0)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self._waiters: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+
+    async def acquire(self, key: Hashable = None):
+        if not self._waiters and self._has_slot():
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(key, deque()).append(waiter)
+            self.queued += 1
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as we were cancelled
+                    self.release()
+                raise
+        self.admitted += 1
+
+        delay = self._reserve()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _has_slot(self) -> bool:
+        return self.max_in_flight <= 0 or self.in_flight < self.max_in_flight
+
+    def _reserve(self) -> float:
+        """Take a token and return how long until it is actually earned."""
+        if self.rps <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rps)
+        self.updated_at = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rps
+
+    def _dispatch(self):
+        while self._waiters and self._has_slot():
+            key, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            # Skip callers that gave up, or whose event loop is gone
+            if waiter.done() or waiter.get_loop().is_closed():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": sum(len(waiters) for waiters in self._waiters.values()),
+            "admitted": self.admitted,
+            "queued": self.queued,
+        }
+
+
+class Governors:
+    def __init__(self):
+        self.governors: Dict[str, RouteGovernor] = {}
+
+    def for_route(self, route: str) -> RouteGovernor:
+        if route not in self.governors:
+            self.governors[route] = RouteGovernor(
+                settings.upstream_route_rps.get(route, settings.upstream_rps),
+                settings.upstream_route_max_in_flight.get(
+                    route, settings.upstream_max_in_flight
+                ),
+            )
+        return self.governors[route]
+
+    def stats(self) -> Dict:
+        return {route: governor.stats() for route, governor in self.governors.items()}
+
+
+@contextmanager
+def fair_share_scope(key: Hashable):
+    """Queue every upstream call made inside the block (and tasks it spawns)
+    under ``key``."""
+    token = fair_share_key.set(key)
+    try:
+        yield
+    finally:
+        fair_share_key.reset(token)
+
+
+governors = Governors()
@@ -0,0 +1,181 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from fastapi import HTTPException
+
+from app.core.settings import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Upstream collections; the path segment after one of them is a resource id
+RESOURCE_COLLECTIONS = frozenset({"account", "consent", "dynamic-client"})
+
+extraction_deadline: ContextVar[Optional[float]] = ContextVar(
+    "extraction_deadline", default=None
+)
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of successful requests.
+
+    Every success deposits ``ratio`` tokens (up to ``max_tokens``) and every
+    retry spends one, so when upstream degrades retries dry up instead of
+    multiplying the load. ``min_tokens`` is the initial reserve.
+    """
+
+    def __init__(self, ratio: float, min_tokens: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min_tokens
+        self.retries_allowed = 0
+        self.retries_denied = 0
+
+    def record_success(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.retries_allowed += 1
+            return True
+        self.retries_denied += 1
+        return False
+
+    def stats(self) -> Dict:
+        return {
+            "tokens": round(self.tokens, 2),
+            "retries_allowed": self.retries_allowed,
+            "retries_denied": self.retries_denied,
+        }
+
+
+class CircuitBreaker:
+    """Fails fast for one upstream route after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are rejected for ``reset_timeout_s``; then one trial request is
+    let through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_s: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+
+    def before_request(self, route: str) -> bool:
+        """Raise a 503 while the circuit is open; return whether this request
+        is the half-open trial."""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout_s:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503, detail=f"Circuit open for {route}."
+                )
+            self.state = HALF_OPEN
+            return True
+        if self.state == HALF_OPEN:
+            # A trial request is already in flight
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail=f"Circuit open for {route}.")
+        return False
+
+    def abandon_trial(self):
+        """Give back a trial that ended without an outcome (e.g. cancelled).
+
+        The circuit goes back to open with the reset timeout already expired,
+        so the next request becomes the trial.
+        """
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+
+    def record_success(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (
+            self.consecutive_failures >= self.failure_threshold
+        ):
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakers:
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    @staticmethod
+    def route(method: str, url: str) -> str:
+        """Route template of ``url``, e.g. ``GET /account/{id}/balance/``.
+
+        Ids are recognized by position rather than by shape, so every id
+        (``acc1`` as much as a UUID) maps to the same breaker, governor and
+        metrics label.
+        """
+        segments = urlparse(url).path.split("/")
+        template = [
+            (
+                "{id}"
+                if index and segments[index - 1] in RESOURCE_COLLECTIONS and segment
+                else segment
+            )
+            for index, segment in enumerate(segments)
+        ]
+        return f"{method.upper()} {'/'.join(template)}"
+
+    def for_route(self, route: str) -> CircuitBreaker:
+        if route not in self.breakers:
+            self.breakers[route] = CircuitBreaker(
+                settings.circuit_failure_threshold, settings.circuit_reset_timeout_s
+            )
+        return self.breakers[route]
+
+    def stats(self) -> Dict:
+        return {route: breaker.stats() for route, breaker in self.breakers.items()}
+
+
+def deadline_remaining() -> Optional[float]:
+    deadline = extraction_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Bound every upstream call made inside the block (and tasks it spawns)
+    to one total deadline. Nested scopes keep the earliest deadline."""
+    deadline = time.monotonic() + seconds
+    current = extraction_deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = extraction_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        extraction_deadline.reset(token)
+
+
+retry_budget = RetryBudget(
+    settings.retry_budget_ratio,
+    settings.retry_budget_min_tokens,
+    settings.retry_budget_max_tokens,
+)
+circuit_breakers = CircuitBreakers()
@@ -0,0 +1,25 @@
+from typing import Dict, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ModelJSONResponse(JSONResponse):
+    """JSON response that serializes Pydantic models in a single pass.
+
+    Models go straight through ``model_dump_json`` (pydantic-core, in Rust)
+    instead of FastAPI's ``jsonable_encoder`` + stdlib ``json`` round trip;
+    anything else is encoded with orjson. ``exclude`` is passed on to
+    ``model_dump_json``, e.g. for a request's field projection.
+    """
+
+    def __init__(self, content, *args, exclude: Optional[Dict] = None, **kwargs):
+        # Set before JSONResponse.__init__, which renders the body
+        self.exclude = exclude
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json(exclude=self.exclude).encode()
+        return orjson.dumps(content)
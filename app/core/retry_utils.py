@@ -1,26 +1,110 @@
+import asyncio
+import time
+
+import httpx
 from tenacity import (
     retry,
-    wait_exponential,
+    wait_random_exponential,
     stop_after_attempt,
     retry_if_exception_type,
+    retry_all,
 )
-import requests
-from requests.exceptions import Timeout
+from httpx import TimeoutException
 from fastapi import HTTPException
 
+from app.core.http_client import http_pool
+from app.core.metrics import record_retry, record_upstream_request
+from app.core.rate_limiter import fair_share_key, governors
+from app.core.resilience import (
+    CircuitBreaker,
+    circuit_breakers,
+    deadline_remaining,
+    retry_budget,
+)
+from app.core.settings import settings
+
+
+def stop_at_deadline(retry_state) -> bool:
+    remaining = deadline_remaining()
+    if remaining is None:
+        return False
+    # Don't start a backoff sleep that would run past the deadline
+    return remaining <= (retry_state.upcoming_sleep or 0)
+
+
+def retry_if_budget_allows(retry_state) -> bool:
+    return retry_budget.try_spend()
+
+
+def count_retry(retry_state):
+    method, url = retry_state.args[:2]
+    record_retry(circuit_breakers.route(method, url))
+
 
 @retry(
-    stop=stop_after_attempt(10),
-    wait=wait_exponential(multiplier=0.5, max=5),
-    retry=retry_if_exception_type(Timeout),
+    stop=stop_after_attempt(settings.retry_max_attempts) | stop_at_deadline,
+    wait=wait_random_exponential(
+        multiplier=settings.retry_backoff_multiplier_s,
+        max=settings.retry_backoff_max_s,
+    ),
+    retry=retry_all(retry_if_exception_type(TimeoutException), retry_if_budget_allows),
+    before_sleep=count_retry,
     reraise=True,
 )
-def request_with_retry(method: str, url: str, **kwargs):
+async def request_with_retry(method: str, url: str, **kwargs):
+    remaining = deadline_remaining()
+    if remaining is not None and remaining <= 0:
+        raise TimeoutException("Extraction deadline exceeded.")
+
+    route = circuit_breakers.route(method, url)
+    breaker = circuit_breakers.for_route(route)
+    trial = breaker.before_request(route)
     try:
-        response = requests.request(method, url, **kwargs)
+        return await _send(breaker, route, method, url, **kwargs)
+    finally:
+        # A trial that recorded neither success nor failure (cancelled, or
+        # rejected before reaching upstream) must not leave the circuit
+        # half-open for good
+        if trial:
+            breaker.abandon_trial()
+
+
+async def _send(breaker: CircuitBreaker, route: str, method: str, url: str, **kwargs):
+    governor = governors.for_route(route)
+    try:
+        # Queue for a slot, but never past the extraction deadline
+        async with asyncio.timeout(deadline_remaining()):
+            await governor.acquire(fair_share_key.get())
+    except TimeoutError:
+        raise TimeoutException("Extraction deadline exceeded.")
+
+    remaining = deadline_remaining()
+    if remaining is not None:
+        if remaining <= 0:
+            governor.release()
+            raise TimeoutException("Extraction deadline exceeded.")
+        # The call itself must not outlive the deadline either
+        kwargs["timeout"] = httpx.Timeout(
+            min(remaining, settings.http_read_timeout_s),
+            connect=min(remaining, settings.http_connect_timeout_s),
+        )
+
+    try:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await http_pool.request(method, url, **kwargs)
+            outcome = str(response.status_code)
+        finally:
+            record_upstream_request(route, outcome, time.perf_counter() - started)
 
         if response.status_code == 504:
-            raise requests.exceptions.Timeout()
+            raise TimeoutException("External API returned 504.")
+
+        if response.status_code == 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
 
         if response.status_code == 422:
             detail = "Validation error."
@@ -36,10 +120,19 @@ def request_with_retry(method: str, url: str, **kwargs):
             )
 
         response.raise_for_status()
+        retry_budget.record_success()
         return response
 
-    except Timeout:
+    except TimeoutException:
+        breaker.record_failure()
+        raise
+
+    except HTTPException:
         raise
 
     except Exception as err:
+        breaker.record_failure()
         raise HTTPException(status_code=502, detail=f"Unexpected error: {str(err)}")
+
+    finally:
+        governor.release()
@@ -0,0 +1,124 @@
+from typing import Dict, Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Open Finance API every client and extractor talks to
+    upstream_base_url: str = "http://localhost:8000"
+
+    # Max account fetches (a balance or a transaction walk) running at once per
+    # extraction; a walk may have PAGINATION_WINDOW pages in flight, so up to
+    # account_fetch_concurrency * pagination_window requests per extraction
+    account_fetch_concurrency: int = 5
+
+    # Max user extractions running at once within one batch request
+    batch_concurrency: int = 10
+    # Max user extractions one batch request may ask for (422 above it)
+    batch_max_size: int = 100
+
+    # Background extraction jobs: worker count, max queued jobs (429 past
+    # that), how long finished jobs stay retrievable and each job's total
+    # deadline (in place of extraction_deadline_s, which bounds requests)
+    job_workers: int = 4
+    job_queue_maxsize: int = 100
+    job_ttl_s: int = 3600
+    job_deadline_s: float = 900.0
+
+    # Pages requested at once when walking /account/ and /transactions/ (1 = serial)
+    pagination_window: int = 4
+
+    # Accounts per consent_id kept from each /account/ crawl, and whether to
+    # send consent_id as a filter param on /account/
+    account_index_ttl_s: int = 300
+    account_index_maxsize: int = 1000
+    account_consent_filter: bool = True
+
+    # Send a request's date_from/date_to as query params on /transactions/;
+    # pages are filtered locally either way
+    transaction_date_filter: bool = True
+
+    # "strict" validates every transaction; "fast" trusts upstream rows and
+    # builds models without per-row validation
+    normalization_mode: Literal["strict", "fast"] = "strict"
+
+    # Backend for EncryptedCache: "memory" (per process), "file" (SQLite file
+    # shared by workers on one host) or "redis" (anything speaking RESP)
+    cache_backend: Literal["memory", "file", "redis"] = "memory"
+    cache_file_path: str = "cache.db"
+    cache_redis_url: str = "redis://localhost:6379/0"
+
+    # Cipher for new cache and local store entries: "fernet" (key in
+    # CRYPTOGRAPHY_KEY) or "aes-gcm" (key in CACHE_AESGCM_KEY); the other key
+    # and CACHE_PREVIOUS_KEYS stay readable
+    cache_cipher: Literal["fernet", "aes-gcm"] = "fernet"
+    dynamic_client_cache_maxsize: int = 100
+    dynamic_client_cache_ttl_s: int = 86400
+    consent_cache_maxsize: int = 100
+    consent_cache_ttl_s: int = 3600
+
+    # Local indexes over the /dynamic-client/ and /consent/ listings: full
+    # refresh interval, and minimum age before a miss triggers a refresh
+    listing_index_refresh_s: float = 300.0
+    listing_index_min_refresh_s: float = 5.0
+
+    # Encrypted cache of whole extraction responses per (organization, user)
+    extraction_cache_enabled: bool = False
+    extraction_cache_ttl_s: int = 300
+    extraction_cache_maxsize: int = 100
+
+    # Partial results: per-account failures go to Summary.errors instead of
+    # failing the extraction; the accounts that succeeded are kept so the
+    # next call only fetches the failed ones
+    partial_results_enabled: bool = False
+    partial_result_ttl_s: int = 600
+    partial_result_maxsize: int = 100
+
+    # Incremental transaction sync: keep each account's history and resume
+    # from the last page reached instead of re-crawling from page 1
+    incremental_sync_enabled: bool = False
+    transaction_history_ttl_s: int = 86400
+    transaction_history_maxsize: int = 1000
+
+    # SQLite file shared by all workers on the host; unset keeps everything
+    # in process memory only
+    local_store_path: Optional[str] = None
+
+    # Upstream retries: attempts and jittered exponential backoff per call,
+    # a shared budget of retries (ratio of successes, with an initial
+    # reserve), per-route circuit breakers and a total deadline per extraction
+    retry_max_attempts: int = 10
+    retry_backoff_multiplier_s: float = 0.5
+    retry_backoff_max_s: float = 5.0
+    retry_budget_ratio: float = 0.1
+    retry_budget_min_tokens: float = 10.0
+    retry_budget_max_tokens: float = 100.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout_s: float = 30.0
+    extraction_deadline_s: float = 60.0
+
+    # Timing breakdown per extraction: in Summary.timings (off by default, it
+    # grows the payload) and as a Server-Timing response header
+    summary_timings_enabled: bool = False
+    server_timing_enabled: bool = True
+
+    # Upstream governor: requests per second and requests in flight per
+    # route ("GET /account/", "GET /account/{id}/transactions/", ...), with
+    # per-route overrides as JSON maps; 0 disables a limit
+    upstream_rps: float = 50.0
+    upstream_max_in_flight: int = 20
+    upstream_route_rps: Dict[str, float] = {}
+    upstream_route_max_in_flight: Dict[str, int] = {}
+
+    # Shared upstream connection pool
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_max_connections_per_host: int = 50
+    http_keepalive_expiry_s: float = 30.0
+    http_connect_timeout_s: float = 5.0
+    http_read_timeout_s: float = 30.0
+
+
+settings = Settings()
@@ -1,70 +1,280 @@
+import asyncio
+import math
+from collections import defaultdict
+from datetime import date
+from functools import partial
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+from fastapi import HTTPException
+
+from app.core.lazy import Lazy
 from app.core.retry_utils import request_with_retry
+from app.core.settings import settings
+from app.core.single_flight import SingleFlight
 
+BASE_URL = settings.upstream_base_url
 
-BASE_URL = "http://localhost:8000"
 
+def within_dates(
+    transactions: List[Dict], date_from: Optional[date], date_to: Optional[date]
+) -> List[Dict]:
+    """Keep the raw transactions dated inside ``[date_from, date_to]``."""
+    if date_from is None and date_to is None:
+        return transactions
+    low, high = _date_bounds(date_from, date_to)
+    return [
+        transaction
+        for transaction in transactions
+        if low <= _transaction_day(transaction) <= high
+    ]
 
-class Extractor:
-    def get_account(self, consent_token: str, consent_id: str):
-        page_number = 1
-        next_page = True
-        matched_accounts = []
 
-        headers = {"Authorization": f"{consent_token}"}
+def _date_bounds(date_from: Optional[date], date_to: Optional[date]) -> Tuple[str, str]:
+    # Compared as ISO strings, like the upstream dates
+    return (
+        date_from.isoformat() if date_from else "",
+        date_to.isoformat() if date_to else "9999-12-31",
+    )
 
-        while next_page == True:
-            params = {"page": page_number}
-            response = request_with_retry(
-                "GET", f"{BASE_URL}/account/", headers=headers, params=params
-            )
 
-            response_dict = response.json()
+def _transaction_day(transaction: Dict) -> str:
+    return (transaction.get("transaction_date") or "")[:10]
 
-            accounts = response_dict.get("items")
 
-            for account in accounts:
-                if account.get("consent_id") == consent_id:
-                    matched_accounts.append(account)
+class Extractor:
+    def __init__(self):
+        # consent_id -> accounts, filled from every /account/ crawl
+        self.account_index = TTLCache(
+            maxsize=settings.account_index_maxsize, ttl=settings.account_index_ttl_s
+        )
+        self._single_flight = SingleFlight()
 
-            next_page = response_dict.get("has_next")
-            page_number += 1
+    async def get_account(self, consent_token: str, consent_id: str):
+        matched_accounts = self.account_index.get(consent_id)
+
+        if matched_accounts is None:
+            matched_accounts = await self._single_flight.do(
+                consent_id, partial(self.__crawl_accounts, consent_token, consent_id)
+            )
 
         if len(matched_accounts) == 0:
             raise Exception("Account not found")
 
         return matched_accounts
 
-    def get_account_balance(self, consent_token: str, account_id: str):
+    async def __crawl_accounts(self, consent_token: str, consent_id: str):
+        """Walk /account/ once and index every consent seen along the way.
+
+        ``consent_id`` is also sent as a query param: an upstream that
+        supports it returns only this consent's pages, one that doesn't
+        ignores it. Either way the items are filtered here as well.
+        """
         headers = {"Authorization": f"{consent_token}"}
-        response = request_with_retry(
+        params = {}
+        if settings.account_consent_filter:
+            params["consent_id"] = consent_id
+
+        accounts_by_consent = defaultdict(list)
+        async for accounts in self._iter_pages(f"{BASE_URL}/account/", headers, params):
+            for account in accounts:
+                accounts_by_consent[account.get("consent_id")].append(account)
+
+        for account_consent_id, accounts in accounts_by_consent.items():
+            self.account_index[account_consent_id] = accounts
+
+        return accounts_by_consent.get(consent_id, [])
+
+    async def get_account_balance(self, consent_token: str, account_id: str):
+        headers = {"Authorization": f"{consent_token}"}
+        response = await request_with_retry(
             "GET", f"{BASE_URL}/account/{account_id}/balance/", headers=headers
         )
 
         return response.json()
 
-    def get_account_transactions(self, consent_token: str, account_id: str):
-        next_page = True
-        page_number = 1
+    async def get_account_transactions(
+        self,
+        consent_token: str,
+        account_id: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ):
         transactions = []
 
+        pages = self.iter_account_transactions(
+            consent_token, account_id, date_from, date_to
+        )
+        async for items in pages:
+            transactions.extend(items)
+
+        return transactions
+
+    def iter_account_transactions(
+        self,
+        consent_token: str,
+        account_id: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> AsyncIterator[List]:
+        """Yield transaction pages, limited to ``[date_from, date_to]`` if set.
+
+        The dates are sent as query params for upstreams that filter on
+        them; pages are filtered here as well, and walking stops once the
+        pages fall past the window.
+        """
+        headers = {"Authorization": f"{consent_token}"}
+        params = {}
+        if settings.transaction_date_filter:
+            if date_from:
+                params["date_from"] = date_from.isoformat()
+            if date_to:
+                params["date_to"] = date_to.isoformat()
+
+        pages = self._iter_pages(
+            f"{BASE_URL}/account/{account_id}/transactions/", headers, params
+        )
+        if date_from is None and date_to is None:
+            return pages
+        return self._filter_pages(pages, date_from, date_to)
+
+    def iter_numbered_transaction_pages(
+        self, consent_token: str, account_id: str, start_page: int = 1
+    ) -> AsyncIterator[Tuple[int, List]]:
         headers = {"Authorization": f"{consent_token}"}
+        return self._iter_numbered_pages(
+            f"{BASE_URL}/account/{account_id}/transactions/", headers, start_page
+        )
+
+    async def _iter_pages(
+        self, url: str, headers: Dict, params: Optional[Dict] = None
+    ) -> AsyncIterator[List]:
+        async for _, items in self._iter_numbered_pages(url, headers, params=params):
+            yield items
+
+    @staticmethod
+    async def _filter_pages(
+        pages: AsyncIterator[List], date_from: Optional[date], date_to: Optional[date]
+    ) -> AsyncIterator[List]:
+        """Filter each page to the date window and stop paging past it.
+
+        Upstream history is sorted by date, newest or oldest first. The
+        order is taken from the first two different dates seen; from then
+        on, a page ending before ``date_from`` (newest first) or after
+        ``date_to`` (oldest first) means no later page can match. Rows
+        without a date are dropped but ignored when deciding to stop.
+        """
+        low, high = _date_bounds(date_from, date_to)
+        newest_first = None
+        first_day = None
+        try:
+            async for items in pages:
+                days = [_transaction_day(item) for item in items]
+                yield [item for item, day in zip(items, days) if low <= day <= high]
+
+                # Undated rows say nothing about the order or the position
+                dated = [day for day in days if day]
+                if not dated:
+                    continue
+                first_day = first_day or dated[0]
+                if newest_first is None and dated[-1] != first_day:
+                    newest_first = dated[-1] < first_day
+
+                if newest_first is True and dated[-1] < low:
+                    return
+                if newest_first is False and dated[-1] > high:
+                    return
+        finally:
+            await pages.aclose()
 
-        while next_page == True:
-            params = {"page": page_number}
-            response = request_with_retry(
-                "GET",
-                f"{BASE_URL}/account/{account_id}/transactions/",
-                headers=headers,
-                params=params,
+    async def _iter_numbered_pages(
+        self,
+        url: str,
+        headers: Dict,
+        start_page: int = 1,
+        params: Optional[Dict] = None,
+    ) -> AsyncIterator[Tuple[int, List]]:
+        """Yield ``(page_number, items)`` for each page in order.
+
+        ``start_page`` is fetched alone; after that pages are requested
+        ``settings.pagination_window`` at a time. Walking stops at the first
+        page that reports ``has_next=False`` or comes back empty, or at the
+        last page when upstream reports a total count. Speculative pages past
+        the end may fail (404, 422, 504...) without failing the walk.
+        """
+        params = params or {}
+        first_page = await self._fetch_page(url, headers, params, start_page)
+        items = first_page.get("items") or []
+        yield start_page, items
+
+        if not first_page.get("has_next") or not items:
+            return
+
+        total_pages = self._total_pages(first_page, len(items))
+        window = max(settings.pagination_window, 1)
+        next_page = start_page + 1
+
+        while total_pages is None or next_page <= total_pages:
+            last_page = next_page + window - 1
+            if total_pages is not None:
+                last_page = min(last_page, total_pages)
+
+            fetches = [
+                asyncio.ensure_future(
+                    self._fetch_page(url, headers, params, page_number, True)
+                )
+                for page_number in range(next_page, last_page + 1)
+            ]
+            try:
+                # In page order: an error only counts if it comes before the
+                # page that ends the walk; fetches past that page are
+                # cancelled and whatever they raised is dropped
+                for page_number, fetch in enumerate(fetches, start=next_page):
+                    page = await fetch
+                    items = page.get("items") or []
+                    if not items:
+                        return
+                    yield page_number, items
+                    if not page.get("has_next"):
+                        return
+            finally:
+                for fetch in fetches:
+                    fetch.cancel()
+                await asyncio.gather(*fetches, return_exceptions=True)
+
+            next_page = last_page + 1
+
+    async def _fetch_page(
+        self,
+        url: str,
+        headers: Dict,
+        params: Dict,
+        page_number: int,
+        speculative: bool = False,
+    ) -> Dict:
+        try:
+            response = await request_with_retry(
+                "GET", url, headers=headers, params={**params, "page": page_number}
             )
+        except HTTPException as err:
+            # A page requested past the end may not exist upstream
+            if speculative and err.status_code == 404:
+                return {"items": [], "has_next": False}
+            raise
 
-            response_dict = response.json()
-            transactions.extend(response_dict.get("items"))
+        return response.json()
 
-            next_page = response_dict.get("has_next")
-            page_number += 1
+    @staticmethod
+    def _total_pages(page: Dict, page_size: int) -> Optional[int]:
+        for key in ("total_pages", "pages"):
+            if isinstance(page.get(key), int):
+                return page[key]
 
-        return transactions
+        for key in ("total", "count", "total_items"):
+            if isinstance(page.get(key), int) and page_size:
+                return math.ceil(page[key] / page_size)
+
+        return None
 
 
-extractor = Extractor()
+extractor: Lazy[Extractor] = Lazy(Extractor)
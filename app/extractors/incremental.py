@@ -0,0 +1,167 @@
+from typing import Dict, List, Optional
+
+import orjson
+from fastapi import HTTPException
+
+from app.core.encrypted_cache import cache
+from app.core.lazy import Lazy
+from app.extractors.extractor import extractor
+
+
+class IncrementalTransactionSync:
+    """Fetch only the transaction pages added since the last extraction.
+
+    For each account we keep the raw history plus a cursor with the last page
+    reached, the id of the last transaction on it, the newest date seen and
+    the order of the history (detected from its dates).
+
+    Oldest first, new rows are appended at the tail: the next run re-fetches
+    the cursor page, appends whatever follows the known transaction and keeps
+    walking from there. Newest first, new rows show up on page 1: the next
+    run walks from page 1 and stops at the first known transaction or the
+    first one older than the newest date. If the known transaction can't be
+    found (the history was reordered or rewritten upstream) we fall back to a
+    full crawl.
+    """
+
+    async def get_account_transactions(
+        self, consent_token: str, account_id: str
+    ) -> List[Dict]:
+        state = await self.__load(account_id)
+        if state and state.get("cursor"):
+            if state["cursor"].get("newest_first"):
+                resume = self.__resume_from_head
+            else:
+                resume = self.__resume
+            transactions = await resume(consent_token, account_id, state)
+            if transactions is not None:
+                return transactions
+
+        return await self.__full_sync(consent_token, account_id)
+
+    async def __full_sync(self, consent_token: str, account_id: str) -> List[Dict]:
+        transactions = []
+        cursor = None
+
+        pages = extractor.iter_numbered_transaction_pages(consent_token, account_id)
+        async for page_number, items in pages:
+            transactions.extend(items)
+            if items:
+                cursor = self.__cursor(page_number, items, transactions)
+
+        await self.__save(account_id, cursor, transactions)
+        return transactions
+
+    async def __resume(
+        self, consent_token: str, account_id: str, state: Dict
+    ) -> Optional[List[Dict]]:
+        cursor = state.get("cursor")
+        transactions = state.get("transactions", [])
+        if not cursor:
+            return None
+
+        pages = extractor.iter_numbered_transaction_pages(
+            consent_token, account_id, start_page=cursor["page"]
+        )
+        try:
+            page_number, items = await anext(pages)
+            ids = [item.get("id") for item in items]
+            if cursor["last_transaction_id"] not in ids:
+                return None
+
+            known_ids = {transaction.get("id") for transaction in transactions}
+            new_transactions = items[ids.index(cursor["last_transaction_id"]) + 1 :]
+            last_page, last_items = page_number, items
+
+            async for page_number, items in pages:
+                new_transactions.extend(items)
+                last_page, last_items = page_number, items
+        except HTTPException as err:
+            if err.status_code == 404:
+                return None
+            raise
+        finally:
+            await pages.aclose()
+
+        transactions.extend(
+            transaction
+            for transaction in new_transactions
+            if transaction.get("id") not in known_ids
+        )
+        cursor = self.__cursor(last_page, last_items, transactions)
+        await self.__save(account_id, cursor, transactions)
+        return transactions
+
+    async def __resume_from_head(
+        self, consent_token: str, account_id: str, state: Dict
+    ) -> Optional[List[Dict]]:
+        cursor = state["cursor"]
+        transactions = state.get("transactions", [])
+        known_ids = {transaction.get("id") for transaction in transactions}
+
+        new_transactions = []
+        reached_known = False
+        pages = extractor.iter_numbered_transaction_pages(consent_token, account_id)
+        try:
+            async for _, items in pages:
+                for item in items:
+                    day = item.get("transaction_date") or ""
+                    if item.get("id") in known_ids or (
+                        day and day < cursor["newest_date"]
+                    ):
+                        reached_known = True
+                        break
+                    new_transactions.append(item)
+                if reached_known:
+                    break
+        except HTTPException as err:
+            if err.status_code == 404:
+                return None
+            raise
+        finally:
+            await pages.aclose()
+
+        if not reached_known:
+            return None
+
+        transactions = new_transactions + transactions
+        # Only the head moved, so the cursor just needs the newest date
+        cursor = {**cursor, "newest_date": self.__newest_date(transactions)}
+        await self.__save(account_id, cursor, transactions)
+        return transactions
+
+    @staticmethod
+    def __cursor(page_number: int, items: List[Dict], transactions: List[Dict]) -> Dict:
+        dates = [
+            transaction.get("transaction_date")
+            for transaction in transactions
+            if transaction.get("transaction_date")
+        ]
+        return {
+            "page": page_number,
+            "last_transaction_id": items[-1].get("id"),
+            "newest_date": max(dates, default=""),
+            "newest_first": bool(dates) and dates[0] > dates[-1],
+        }
+
+    @staticmethod
+    def __newest_date(transactions: List[Dict]) -> str:
+        return max(
+            (item.get("transaction_date") or "" for item in transactions),
+            default="",
+        )
+
+    @staticmethod
+    async def __load(account_id: str) -> Optional[Dict]:
+        payload = await cache.get_transaction_history(account_id)
+        if payload is None:
+            return None
+        return orjson.loads(payload)
+
+    @staticmethod
+    async def __save(account_id: str, cursor: Optional[Dict], transactions: List[Dict]):
+        payload = orjson.dumps({"cursor": cursor, "transactions": transactions})
+        await cache.set_transaction_history(account_id, payload.decode())
+
+
+incremental_sync: Lazy[IncrementalTransactionSync] = Lazy(IncrementalTransactionSync)
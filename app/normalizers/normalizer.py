@@ -1,8 +1,12 @@
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime, timezone
-import pytz
+from zoneinfo import ZoneInfo
 
+from app.core.lazy import Lazy
+from app.core.metrics import timed
+from app.core.settings import settings
 from app.schemas.schemas import (
+    AccountError,
     ExtractRequest,
     Account,
     Summary,
@@ -11,6 +15,11 @@ from app.schemas.schemas import (
     Response,
 )
 
+TRANSACTION_FIELDS = frozenset(Transactions.model_fields)
+
+# Loaded once at import instead of on every response
+SAO_PAULO = ZoneInfo("America/Sao_Paulo")
+
 
 class Normalizer:
     def normalize_data(
@@ -18,26 +27,22 @@ class Normalizer:
         account: Dict,
         balance: Dict,
         transactions: List,
+    ):
+        transactions_pd = self.normalize_transactions(
+            transactions, balance.get("currency")
+        )
+        return self.normalize_account(account, balance, transactions_pd)
+
+    def normalize_account(
+        self,
+        account: Dict,
+        balance: Dict,
+        transactions_pd: List[Transactions],
     ):
         balance_pd = Balance(
             amount=balance.get("balance"), currency=balance.get("currency")
         )
 
-        transactions_pd = []
-        for transaction in transactions:
-            transactions_pd.append(
-                Transactions(
-                    transaction_id=transaction.get("id"),
-                    transaction_type=transaction.get("transaction_type"),
-                    transaction_status=transaction.get("transaction_status"),
-                    amount=transaction.get("transaction_amount"),
-                    currency=balance.get("currency"),
-                    direction=transaction.get("transaction_direction"),
-                    description=transaction.get("transaction_description"),
-                    date=transaction.get("transaction_date"),
-                )
-            )
-
         account_pd = Account(
             account_id=account.get("id"),
             account_type=account.get("account_type"),
@@ -47,6 +52,77 @@ class Normalizer:
 
         return account_pd
 
+    def normalize_transactions(self, transactions: List, currency: str):
+        with timed("normalization"):
+            if settings.normalization_mode == "fast":
+                return self.__construct_transactions(transactions, currency)
+
+            transactions_pd = []
+            for transaction in transactions:
+                transactions_pd.append(
+                    Transactions(
+                        transaction_id=transaction.get("id"),
+                        transaction_type=transaction.get("transaction_type"),
+                        transaction_status=transaction.get("transaction_status"),
+                        amount=transaction.get("transaction_amount"),
+                        currency=currency,
+                        direction=transaction.get("transaction_direction"),
+                        description=transaction.get("transaction_description"),
+                        date=transaction.get("transaction_date"),
+                    )
+                )
+
+            return transactions_pd
+
+    @staticmethod
+    def __construct_transactions(transactions: List, currency: str):
+        """Build ``Transactions`` for trusted upstream rows without validation.
+
+        This is what ``Transactions.model_construct`` does, minus its generic
+        per-field bookkeeping, which makes it slower than validating. Only
+        ``amount`` is coerced so the serialized output stays identical to the
+        strict path (upstream may send ``40`` where we emit ``40.0``).
+
+        Setting pydantic's instance attributes by hand depends on its private
+        layout; ``test_fast_normalization_matches_pydantic_instance_layout``
+        fails if a pydantic upgrade changes it.
+        """
+        new, set_attr = object.__new__, object.__setattr__
+        transactions_pd = []
+        for transaction in transactions:
+            transaction_pd = new(Transactions)
+            set_attr(
+                transaction_pd,
+                "__dict__",
+                {
+                    "transaction_id": transaction.get("id"),
+                    "transaction_type": transaction.get("transaction_type"),
+                    "transaction_status": transaction.get("transaction_status"),
+                    "amount": float(transaction.get("transaction_amount")),
+                    "currency": currency,
+                    "direction": transaction.get("transaction_direction"),
+                    "description": transaction.get("transaction_description"),
+                    "date": transaction.get("transaction_date"),
+                },
+            )
+            set_attr(transaction_pd, "__pydantic_fields_set__", set(TRANSACTION_FIELDS))
+            set_attr(transaction_pd, "__pydantic_extra__", None)
+            set_attr(transaction_pd, "__pydantic_private__", None)
+            transactions_pd.append(transaction_pd)
+
+        return transactions_pd
+
+    async def normalize_transaction_pages(
+        self, pages: AsyncIterator[List], currency: str
+    ):
+        """Normalize pages as they arrive so each raw page can be released
+        before the next one is fetched."""
+        transactions_pd = []
+        async for page in pages:
+            transactions_pd.extend(self.normalize_transactions(page, currency))
+
+        return transactions_pd
+
     def create_response(
         self,
         data_source: ExtractRequest,
@@ -54,12 +130,10 @@ class Normalizer:
         duration: int,
         total_accounts: int,
         normalized_data: List,
+        errors: Optional[List[AccountError]] = None,
     ):
-        summary = Summary(
-            total_accounts=total_accounts,
-            total_transactions=total_transactions,
-            processing_time_ms=duration,
-            errors=[],
+        summary = self.create_summary(
+            total_transactions, duration, total_accounts, errors
         )
         response = Response(
             user_document=data_source.user_document_number,
@@ -70,14 +144,44 @@ class Normalizer:
 
         return response
 
+    def create_stream_trailer(
+        self,
+        data_source: ExtractRequest,
+        total_transactions: int,
+        duration: int,
+        total_accounts: int,
+        errors: Optional[List[AccountError]] = None,
+    ):
+        summary = self.create_summary(
+            total_transactions, duration, total_accounts, errors
+        )
+        return {
+            "user_document": data_source.user_document_number,
+            "extraction_date": self.__get_extraction_date(),
+            "summary": summary.model_dump(),
+        }
+
+    @staticmethod
+    def create_summary(
+        total_transactions: int,
+        duration: int,
+        total_accounts: int,
+        errors: Optional[List[AccountError]] = None,
+    ):
+        return Summary(
+            total_accounts=total_accounts,
+            total_transactions=total_transactions,
+            processing_time_ms=duration,
+            errors=errors or [],
+        )
+
     @staticmethod
     def __get_extraction_date():
         dt_utc = datetime.now(timezone.utc)
 
-        tz_sao_paulo = pytz.timezone("America/Sao_Paulo")
-        dt_sao_paulo = dt_utc.astimezone(tz_sao_paulo)
+        dt_sao_paulo = dt_utc.astimezone(SAO_PAULO)
 
         return dt_sao_paulo.isoformat() + "Z"
 
 
-normalizer = Normalizer()
+normalizer: Lazy[Normalizer] = Lazy(Normalizer)
@@ -1,5 +1,8 @@
-from typing import Dict, List
-from pydantic import BaseModel, PrivateAttr
+from datetime import date
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
+
+from app.core.settings import settings
 
 
 class ExtractRequest(BaseModel):
@@ -8,6 +11,85 @@ class ExtractRequest(BaseModel):
     organization_id: str
     user_document_number: str
     organization_type: str = "INDIVIDUAL"
+    # Optional filters narrowing what is fetched; inclusive dates
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    account_ids: Optional[List[str]] = None
+    account_types: Optional[List[str]] = None
+    # Transaction fields to return; all of them when unset
+    fields: Optional[List[str]] = None
+
+    @model_validator(mode="after")
+    def check_filters(self):
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError("date_from must not be after date_to.")
+        if self.fields is not None:
+            unknown = set(self.fields) - set(Transactions.model_fields)
+            if unknown:
+                raise ValueError(f"Unknown transaction fields: {sorted(unknown)}")
+        return self
+
+    @property
+    def has_filters(self) -> bool:
+        """Whether fewer accounts or transactions than the full extraction
+        are asked for (a field projection alone doesn't count)."""
+        return any(
+            value is not None
+            for value in (
+                self.date_from,
+                self.date_to,
+                self.account_ids,
+                self.account_types,
+            )
+        )
+
+    def account_exclude(self) -> Optional[Dict]:
+        """``exclude`` spec that drops the unrequested fields from an
+        ``Account``'s transactions."""
+        if self.fields is None:
+            return None
+        dropped = set(Transactions.model_fields) - set(self.fields)
+        return {"transactions": {"__all__": dropped}}
+
+    def response_exclude(self) -> Optional[Dict]:
+        account_exclude = self.account_exclude()
+        if account_exclude is None:
+            return None
+        return {"accounts": {"__all__": account_exclude}}
+
+
+class Organization(BaseModel):
+    name: str
+    organization_name: str
+    organization_id: str
+    organization_type: str = "INDIVIDUAL"
+
+
+class BatchExtractRequest(BaseModel):
+    requests: List[ExtractRequest] = Field([], max_length=settings.batch_max_size)
+    # Shorthand for many users under a single organization
+    organization: Optional[Organization] = None
+    user_document_numbers: List[str] = Field([], max_length=settings.batch_max_size)
+
+    @model_validator(mode="after")
+    def check_size(self):
+        size = len(self.requests) + len(self.user_document_numbers)
+        if size > settings.batch_max_size:
+            raise ValueError(
+                f"A batch may hold at most {settings.batch_max_size} extractions."
+            )
+        return self
+
+    def expand(self) -> List[ExtractRequest]:
+        extract_requests = list(self.requests)
+        if self.organization:
+            extract_requests.extend(
+                ExtractRequest(
+                    **self.organization.model_dump(), user_document_number=document
+                )
+                for document in self.user_document_numbers
+            )
+        return extract_requests
 
 
 class Balance(BaseModel):
@@ -26,11 +108,40 @@ class Transactions(BaseModel):
     date: str
 
 
+class AccountError(BaseModel):
+    account_id: str
+    status_code: int
+    message: str
+
+
+class StageTiming(BaseModel):
+    count: int = 0
+    duration_ms: float = 0.0
+
+
+class RouteTiming(StageTiming):
+    retries: int = 0
+
+
+class CacheLookups(BaseModel):
+    hits: int = 0
+    misses: int = 0
+
+
+class TimingBreakdown(BaseModel):
+    stages: Dict[str, StageTiming]
+    upstream: Dict[str, RouteTiming]
+    cache: Dict[str, CacheLookups]
+
+
 class Summary(BaseModel):
     total_accounts: int
     total_transactions: int
     processing_time_ms: int
-    errors: List
+    errors: List[AccountError]
+    cached: bool = False
+    cache_age_ms: Optional[int] = None
+    timings: Optional[TimingBreakdown] = None
 
 
 class Account(BaseModel):
@@ -46,3 +157,47 @@ class Response(BaseModel):
     extraction_date: str
     accounts: List[Account]
     summary: Summary
+
+
+class PartialResult(BaseModel):
+    # Accounts already extracted while others failed
+    accounts: List[Account]
+
+
+class BatchItemError(BaseModel):
+    status_code: int
+    message: str
+
+
+class BatchItemResult(BaseModel):
+    organization_id: str
+    user_document: str
+    response: Optional[Response] = None
+    error: Optional[BatchItemError] = None
+
+
+class BatchSummary(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    processing_time_ms: int
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
+    summary: BatchSummary
+
+
+class ExtractionProgress(BaseModel):
+    accounts_total: int = 0
+    accounts_done: int = 0
+    pages_fetched: int = 0
+
+
+class ExtractionJobStatus(BaseModel):
+    job_id: str
+    status: str
+    progress: ExtractionProgress
+    created_at: float
+    finished_at: Optional[float] = None
+    error: Optional[BatchItemError] = None
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Dict, List
+
+from app.core.error_handlers import describe_error
+from app.core.settings import settings
+from app.schemas.schemas import (
+    BatchExtractRequest,
+    BatchItemError,
+    BatchItemResult,
+    BatchResponse,
+    BatchSummary,
+    ExtractRequest,
+)
+from app.services.service import ExtractFinancialDataService
+
+
+class BatchExtractFinancialDataService:
+    def __init__(self, batch: BatchExtractRequest):
+        self.batch = batch
+
+    async def extract_data(self) -> BatchResponse:
+        start_time = time.time()
+        extract_requests = self.batch.expand()
+
+        dynamic_tokens = await self.__get_dynamic_client_tokens(extract_requests)
+        semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+        results = await asyncio.gather(
+            *[
+                self.__extract_one(semaphore, data_source, dynamic_tokens)
+                for data_source in extract_requests
+            ]
+        )
+
+        failed = sum(1 for result in results if result.error)
+        summary = BatchSummary(
+            total=len(results),
+            succeeded=len(results) - failed,
+            failed=failed,
+            processing_time_ms=int((time.time() - start_time) * 1000),
+        )
+        return BatchResponse(results=results, summary=summary)
+
+    async def __get_dynamic_client_tokens(
+        self, extract_requests: List[ExtractRequest]
+    ) -> Dict:
+        """Resolve one dynamic client token per organization in the batch.
+
+        A failure is kept in place of the token so every user of that
+        organization reports it, without aborting the rest of the batch.
+        """
+        first_by_org = {}
+        for data_source in extract_requests:
+            first_by_org.setdefault(data_source.organization_id, data_source)
+
+        tokens = await asyncio.gather(
+            *[
+                ExtractFinancialDataService(data_source).get_dynamic_client_token()
+                for data_source in first_by_org.values()
+            ],
+            return_exceptions=True,
+        )
+        return dict(zip(first_by_org, tokens))
+
+    async def __extract_one(
+        self, semaphore: asyncio.Semaphore, data_source: ExtractRequest, tokens: Dict
+    ) -> BatchItemResult:
+        result = BatchItemResult(
+            organization_id=data_source.organization_id,
+            user_document=data_source.user_document_number,
+        )
+        try:
+            dynamic_token = tokens[data_source.organization_id]
+            if isinstance(dynamic_token, Exception):
+                raise dynamic_token
+
+            async with semaphore:
+                result.response = await ExtractFinancialDataService(
+                    data_source, dynamic_token=dynamic_token
+                ).extract_data()
+        except Exception as exc:
+            status_code, message = describe_error(exc)
+            result.error = BatchItemError(status_code=status_code, message=message)
+
+        return result
@@ -0,0 +1,131 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.core.error_handlers import describe_error
+from app.core.settings import settings
+from app.schemas.schemas import (
+    BatchItemError,
+    ExtractionJobStatus,
+    ExtractionProgress,
+    ExtractRequest,
+    Response,
+)
+from app.services.service import ExtractFinancialDataService
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class ExtractionJob:
+    def __init__(self, data_source: ExtractRequest):
+        self.id = uuid.uuid4().hex
+        self.data_source = data_source
+        self.status = QUEUED
+        self.progress = ExtractionProgress()
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Response] = None
+        self.error: Optional[BatchItemError] = None
+
+    def describe(self) -> ExtractionJobStatus:
+        return ExtractionJobStatus(
+            job_id=self.id,
+            status=self.status,
+            progress=self.progress,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            error=self.error,
+        )
+
+
+class ExtractionJobQueue:
+    """Bounded queue of extractions run by a pool of background workers.
+
+    Workers are bound to the event loop they were started on; ``start`` is
+    idempotent and restarts them if the running loop changed.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, ExtractionJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=settings.job_queue_maxsize)
+        self._workers = [
+            asyncio.create_task(self.__work()) for _ in range(settings.job_workers)
+        ]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+
+    def submit(self, data_source: ExtractRequest) -> ExtractionJob:
+        self.start()
+        self.__purge_expired()
+
+        job = ExtractionJob(data_source)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=429, detail="Extraction queue is full. Retry later."
+            )
+
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> ExtractionJob:
+        self.__purge_expired()
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found.")
+        return job
+
+    async def __work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self.__run(job)
+            finally:
+                self._queue.task_done()
+
+    async def __run(self, job: ExtractionJob):
+        job.status = RUNNING
+        try:
+            job.result = await ExtractFinancialDataService(
+                job.data_source,
+                progress=job.progress,
+                deadline_s=settings.job_deadline_s,
+            ).extract_data()
+            job.status = SUCCEEDED
+        except Exception as exc:
+            status_code, message = describe_error(exc)
+            job.error = BatchItemError(status_code=status_code, message=message)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def __purge_expired(self):
+        expired_before = time.time() - settings.job_ttl_s
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at and job.finished_at < expired_before:
+                del self.jobs[job_id]
+
+
+job_queue = ExtractionJobQueue()
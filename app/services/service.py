@@ -1,36 +1,84 @@
+import asyncio
 import time
+from functools import partial
+from typing import AsyncIterator, Dict, List, Optional, Union
 
+from app.core.concurrency import gather_or_cancel
 from app.core.encrypted_cache import cache
+from app.core.error_handlers import describe_error
+from app.core.metrics import Timings, timed, timings_scope
+from app.core.rate_limiter import fair_share_scope
+from app.core.resilience import deadline_scope
+from app.core.settings import settings
+from app.core.single_flight import single_flight
 from app.clients.clients import clients
 from app.clients.consents import consents
-from app.extractors.extractor import extractor
+from app.extractors.extractor import extractor, within_dates
+from app.extractors.incremental import incremental_sync
 from app.normalizers.normalizer import normalizer
-from app.schemas.schemas import ExtractRequest
+from app.schemas.schemas import (
+    Account,
+    AccountError,
+    ExtractionProgress,
+    ExtractRequest,
+    PartialResult,
+    Response,
+)
 
 
 class ExtractFinancialDataService:
-    def __init__(self, data_source: ExtractRequest):
+    def __init__(
+        self,
+        data_source: ExtractRequest,
+        dynamic_token: Optional[str] = None,
+        progress: Optional[ExtractionProgress] = None,
+        deadline_s: Optional[float] = None,
+    ):
         self.data_source = data_source
+        self.dynamic_token = dynamic_token
+        self.progress = progress or ExtractionProgress()
+        self.deadline_s = (
+            settings.extraction_deadline_s if deadline_s is None else deadline_s
+        )
+        self.timings = Timings()
 
-    def extract_data(self):
-        start_time = time.time()
+    async def extract_data(self, force_refresh: bool = False):
+        with timings_scope(self.timings), timed("total"):
+            response = await self.__extract_data(force_refresh)
 
-        dynamic_token = self.__get_dynamic_client_token()
-        consent_token, consent_id = self.__get_consent_token(dynamic_token)
-        accounts_raw = extractor.get_account(consent_token, consent_id)
+        if settings.summary_timings_enabled:
+            response.summary.timings = self.timings.breakdown()
+        return response
 
-        total_transactions = 0
-        normalized_data = []
+    async def __extract_data(self, force_refresh: bool):
+        use_cache = (
+            settings.extraction_cache_enabled
+            and not force_refresh
+            and not self.data_source.has_filters
+        )
+        if use_cache:
+            cached_response = await self.__get_cached_response()
+            if cached_response:
+                return cached_response
 
-        for account in accounts_raw:
-            account_id = account.get("id")
-            balance = extractor.get_account_balance(consent_token, account_id)
-            transactions = extractor.get_account_transactions(consent_token, account_id)
-            total_transactions += len(transactions)
+        start_time = time.time()
+
+        with deadline_scope(self.deadline_s), self.__fair_share():
+            consent_token, accounts_raw = await self.__get_accounts()
 
-            normalized_data.append(
-                normalizer.normalize_data(account, balance, transactions)
+            semaphore = asyncio.Semaphore(settings.account_fetch_concurrency)
+            fetch_account = await self.__account_fetcher()
+            results = await gather_or_cancel(
+                *[
+                    partial(fetch_account, semaphore, consent_token, account)
+                    for account in accounts_raw
+                ]
             )
+        normalized_data = [result for result in results if isinstance(result, Account)]
+        errors = [result for result in results if isinstance(result, AccountError)]
+        total_transactions = sum(
+            len(account.transactions) for account in normalized_data
+        )
 
         duration_ms = int((time.time() - start_time) * 1000)
 
@@ -40,36 +88,345 @@ class ExtractFinancialDataService:
             duration_ms,
             len(accounts_raw),
             normalized_data,
+            errors,
         )
 
+        if self.data_source.has_filters:
+            # Only full extractions are cached or kept as partial results
+            return response
+
+        if errors:
+            # Keep what succeeded so the next call only fetches the failures;
+            # an incomplete response is never cached as the extraction
+            await cache.set_partial_result(
+                self.data_source.organization_id,
+                self.data_source.user_document_number,
+                PartialResult(accounts=normalized_data).model_dump_json(),
+            )
+            return response
+
+        if settings.partial_results_enabled:
+            await cache.clear_partial_result(
+                self.data_source.organization_id, self.data_source.user_document_number
+            )
+
+        if not settings.extraction_cache_enabled:
+            return response
+
+        await cache.set_extraction(
+            self.data_source.organization_id,
+            self.data_source.user_document_number,
+            response.model_dump_json(),
+        )
+
+        # The store is the extraction cache's persistent tier and is only read
+        # through it, so it isn't written when the cache is off
+        if cache.store:
+            await asyncio.to_thread(
+                cache.store.save_extraction,
+                self.data_source.organization_id,
+                self.data_source.user_document_number,
+                response.model_dump(),
+            )
+
         return response
 
-    def __get_dynamic_client_token(self) -> str:
+    async def __get_cached_response(self) -> Optional[Response]:
+        org_id = self.data_source.organization_id
+        document = self.data_source.user_document_number
+
+        payload, age_ms = await cache.get_extraction(org_id, document)
+        if payload is not None:
+            response = Response.model_validate_json(payload)
+        elif cache.store:
+            stored, age_ms = await asyncio.to_thread(
+                cache.store.load_extraction,
+                org_id,
+                document,
+                settings.extraction_cache_ttl_s,
+            )
+            if stored is None:
+                return None
+            response = Response.model_validate(stored)
+        else:
+            return None
+
+        response.summary.cached = True
+        response.summary.cache_age_ms = age_ms
+        return response
+
+    async def stream_data(self) -> AsyncIterator[Dict]:
+        """Resolve tokens and accounts, then return an iterator of records.
+
+        Token, consent and account lookups happen before the first record so
+        their errors still go through the regular exception handlers. Each
+        account is yielded as soon as its balance and transactions arrive,
+        followed by a trailing summary record.
+        """
+        start_time = time.time()
+        deadline = time.monotonic() + self.deadline_s
+        with (
+            deadline_scope(self.deadline_s),
+            self.__fair_share(),
+            timings_scope(self.timings),
+        ):
+            consent_token, accounts_raw = await self.__get_accounts()
+        return self.__stream_records(start_time, deadline, consent_token, accounts_raw)
+
+    async def __stream_records(
+        self,
+        start_time: float,
+        deadline: float,
+        consent_token: str,
+        accounts_raw: List[Dict],
+    ) -> AsyncIterator[Dict]:
+        semaphore = asyncio.Semaphore(settings.account_fetch_concurrency)
+
+        # Tasks copy the context when created, so they keep the deadline
+        # and the fair-share key
+        with (
+            deadline_scope(deadline - time.monotonic()),
+            self.__fair_share(),
+            timings_scope(self.timings),
+        ):
+            fetch_account = await self.__account_fetcher()
+            tasks = [
+                asyncio.ensure_future(fetch_account(semaphore, consent_token, account))
+                for account in accounts_raw
+            ]
+        total_transactions = 0
+        errors = []
+        account_exclude = self.data_source.account_exclude()
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    normalized = await next_done
+                except Exception:
+                    # Headers are already sent, so report the failure in-band
+                    yield {
+                        "type": "error",
+                        "message": "Extraction failed while fetching accounts.",
+                    }
+                    return
+
+                if isinstance(normalized, AccountError):
+                    errors.append(normalized)
+                    yield {"type": "error", "data": normalized.model_dump()}
+                    continue
+
+                total_transactions += len(normalized.transactions)
+                yield {
+                    "type": "account",
+                    "data": normalized.model_dump(exclude=account_exclude),
+                }
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        duration_ms = int((time.time() - start_time) * 1000)
+        trailer = normalizer.create_stream_trailer(
+            self.data_source,
+            total_transactions,
+            duration_ms,
+            len(accounts_raw),
+            errors,
+        )
+        if settings.summary_timings_enabled:
+            trailer["summary"]["timings"] = self.timings.breakdown().model_dump()
+        yield {"type": "summary", "data": trailer}
+
+    async def __account_fetcher(self):
+        if not settings.partial_results_enabled:
+            return self.__fetch_account
+        # Accounts kept from a full extraction may hold transactions outside
+        # a filtered request's dates
+        previous = (
+            {} if self.data_source.has_filters else await self.__load_partial_result()
+        )
+        return partial(self.__fetch_account_or_error, previous)
+
+    async def __load_partial_result(self) -> Dict[str, Account]:
+        payload = await cache.get_partial_result(
+            self.data_source.organization_id, self.data_source.user_document_number
+        )
+        if payload is None:
+            return {}
+        partial_result = PartialResult.model_validate_json(payload)
+        return {account.account_id: account for account in partial_result.accounts}
+
+    async def __fetch_account_or_error(
+        self,
+        previous: Dict[str, Account],
+        semaphore: asyncio.Semaphore,
+        consent_token: str,
+        account: dict,
+    ) -> Union[Account, AccountError]:
+        """Like ``__fetch_account``, but reuses an account kept from an earlier
+        partial result and returns a failure as an ``AccountError``."""
+        account_id = account.get("id")
+        if account_id in previous:
+            self.progress.accounts_done += 1
+            return previous[account_id]
+
+        try:
+            return await self.__fetch_account(semaphore, consent_token, account)
+        except Exception as exc:
+            status_code, message = describe_error(exc)
+            return AccountError(
+                account_id=account_id, status_code=status_code, message=message
+            )
+
+    def __fair_share(self):
+        return fair_share_scope(
+            (self.data_source.organization_id, self.data_source.user_document_number)
+        )
+
+    async def __get_accounts(self):
+        dynamic_token = self.dynamic_token
+        if not dynamic_token:
+            with timed("dynamic_client"):
+                dynamic_token = await self.get_dynamic_client_token()
+        with timed("consent"):
+            consent_token, consent_id = await self.__get_consent_token(dynamic_token)
+        with timed("accounts"):
+            accounts_raw = await extractor.get_account(consent_token, consent_id)
+        accounts_raw = self.__select_accounts(accounts_raw)
+        self.progress.accounts_total = len(accounts_raw)
+        return consent_token, accounts_raw
+
+    def __select_accounts(self, accounts_raw: List[Dict]) -> List[Dict]:
+        account_ids = self.data_source.account_ids
+        account_types = self.data_source.account_types
+        return [
+            account
+            for account in accounts_raw
+            if (account_ids is None or account.get("id") in account_ids)
+            and (account_types is None or account.get("account_type") in account_types)
+        ]
+
+    async def __fetch_account(
+        self, semaphore: asyncio.Semaphore, consent_token: str, account: dict
+    ):
+        """Fetch one account's balance and transactions into an ``Account``.
+
+        The balance and the first transaction page are fetched together; the
+        rest of the pages are normalized one at a time as they arrive, so raw
+        transactions never accumulate for the whole history. With incremental
+        sync the stored history is needed anyway, so it is normalized at once.
+        """
+        account_id = account.get("id")
+        date_from, date_to = self.data_source.date_from, self.data_source.date_to
+
+        async def limited(fetch, stage: Optional[str] = None):
+            async with semaphore:
+                if stage is None:
+                    return await fetch()
+                with timed(stage):
+                    return await fetch()
+
+        fetch_balance = partial(
+            limited,
+            partial(extractor.get_account_balance, consent_token, account_id),
+            "balances",
+        )
+
+        if settings.incremental_sync_enabled:
+            balance, transactions = await gather_or_cancel(
+                fetch_balance,
+                partial(
+                    limited,
+                    partial(
+                        incremental_sync.get_account_transactions,
+                        consent_token,
+                        account_id,
+                    ),
+                    "transactions",
+                ),
+            )
+            self.progress.accounts_done += 1
+            # The stored history is kept whole; only this response is narrowed
+            transactions = within_dates(transactions, date_from, date_to)
+            return normalizer.normalize_data(account, balance, transactions)
+
+        pages = self.__count_pages(
+            extractor.iter_account_transactions(
+                consent_token, account_id, date_from, date_to
+            )
+        )
+        try:
+            balance, first_page = await gather_or_cancel(
+                fetch_balance, partial(limited, partial(anext, pages))
+            )
+            currency = balance.get("currency")
+            transactions = normalizer.normalize_transactions(first_page, currency)
+            del first_page
+
+            async with semaphore:
+                transactions.extend(
+                    await normalizer.normalize_transaction_pages(pages, currency)
+                )
+        finally:
+            await pages.aclose()
+
+        self.progress.accounts_done += 1
+        return normalizer.normalize_account(account, balance, transactions)
+
+    async def __count_pages(self, pages: AsyncIterator[List]) -> AsyncIterator[List]:
+        try:
+            while True:
+                # Only the wait for each page counts as "transactions"; what
+                # the consumer does with it is timed separately
+                with timed("transactions"):
+                    try:
+                        page = await anext(pages)
+                    except StopAsyncIteration:
+                        break
+                self.progress.pages_fetched += 1
+                yield page
+        finally:
+            await pages.aclose()
+
+    async def get_dynamic_client_token(self) -> str:
         org_id = self.data_source.organization_id
-        dynamic_token = cache.get_dynamic_client_token(org_id)
+        dynamic_token = await cache.get_dynamic_client_token(org_id)
 
         if dynamic_token:
             return dynamic_token
 
-        dynamic_token = clients.get_dynamic_client_token(org_id)
+        return await single_flight.do(
+            ("dynamic-client", org_id), self.__fetch_dynamic_client_token
+        )
+
+    async def __fetch_dynamic_client_token(self) -> str:
+        org_id = self.data_source.organization_id
+        dynamic_token = await clients.get_dynamic_client_token(org_id)
 
         if not dynamic_token:
-            dynamic_token = clients.create_dynamic_client_token(self.data_source)
+            dynamic_token = await clients.create_dynamic_client_token(self.data_source)
 
-        cache.set_dynamic_client_token(org_id, dynamic_token)
+        await cache.set_dynamic_client_token(org_id, dynamic_token)
         return dynamic_token
 
-    def __get_consent_token(self, dynamic_token: str) -> str:
+    async def __get_consent_token(self, dynamic_token: str) -> str:
         document = self.data_source.user_document_number
-        consent_token, consent_id = cache.get_consent(document)
+        consent_token, consent_id = await cache.get_consent(document)
 
         if consent_token:
             return consent_token, consent_id
 
-        consent_token, consent_id = consents.get_consent(document, dynamic_token)
+        return await single_flight.do(
+            ("consent", document), partial(self.__fetch_consent_token, dynamic_token)
+        )
+
+    async def __fetch_consent_token(self, dynamic_token: str) -> str:
+        document = self.data_source.user_document_number
+        consent_token, consent_id = await consents.get_consent(document, dynamic_token)
 
         if not consent_token:
-            consent_token, consent_id = consents.create_consent(document, dynamic_token)
+            consent_token, consent_id = await consents.create_consent(
+                document, dynamic_token
+            )
 
-        cache.set_consent(document, consent_token, consent_id)
+        await cache.set_consent(document, consent_token, consent_id)
         return consent_token, consent_id
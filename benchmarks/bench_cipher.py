@@ -0,0 +1,71 @@
+"""Compare cache ciphers on the values the cache actually holds.
+
+Run with ``python -m benchmarks.bench_cipher``.
+"""
+
+import timeit
+
+from cryptography.fernet import Fernet
+
+from app.core.ciphers import AesGcmCipher, FernetCipher, MultiCipher
+
+NUMBER = 20000
+CONSENT_TOKEN = "ct-" + "x" * 64
+CONSENT_ID = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+# Roughly one cached extraction of a few hundred transactions
+EXTRACTION = b'{"transaction_id":"tx","amount":40.0}' * 3000
+
+
+def main():
+    fernet = FernetCipher(Fernet.generate_key().decode())
+    aes_gcm = AesGcmCipher(AesGcmCipher.generate_key())
+    # After switching to AES-GCM, with the Fernet key kept for old entries
+    rotated = MultiCipher([aes_gcm, fernet])
+
+    # How get_consent used to work: token and id encrypted separately
+    pair = (fernet.encrypt(CONSENT_TOKEN.encode()), fernet.encrypt(CONSENT_ID.encode()))
+    consent = f"{CONSENT_TOKEN}\n{CONSENT_ID}".encode()
+    fernet_blob, aes_gcm_blob = fernet.encrypt(consent), aes_gcm.encrypt(consent)
+    fernet_extraction = fernet.encrypt(EXTRACTION)
+    aes_extraction = aes_gcm.encrypt(EXTRACTION)
+
+    cases = [
+        (
+            "consent lookup, fernet x2",
+            lambda: [fernet.decrypt(token) for token in pair],
+            NUMBER,
+        ),
+        (
+            "consent lookup, fernet blob",
+            lambda: fernet.decrypt(fernet_blob),
+            NUMBER,
+        ),
+        (
+            "consent lookup, aes-gcm blob",
+            lambda: aes_gcm.decrypt(aes_gcm_blob),
+            NUMBER,
+        ),
+        (
+            "consent lookup, rotated (old)",
+            lambda: rotated.decrypt(fernet_blob),
+            NUMBER,
+        ),
+        ("extraction, fernet", lambda: fernet.decrypt(fernet_extraction), 200),
+        ("extraction, aes-gcm", lambda: aes_gcm.decrypt(aes_extraction), 200),
+    ]
+
+    print("Decrypt cost per lookup, best of 5")
+    for name, decrypt, number in cases:
+        best = min(timeit.repeat(decrypt, number=number, repeat=5)) / number
+        print(f"  {name:<32} {best * 1e6:9.2f} us")
+
+    print("Stored size")
+    print(f"  {'consent, fernet x2':<32} {sum(map(len, pair)):9d} B")
+    print(f"  {'consent, fernet blob':<32} {len(fernet_blob):9d} B")
+    print(f"  {'consent, aes-gcm blob':<32} {len(aes_gcm_blob):9d} B")
+    print(f"  {'extraction, fernet':<32} {len(fernet_extraction):9d} B")
+    print(f"  {'extraction, aes-gcm':<32} {len(aes_extraction):9d} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""End-to-end extraction benchmark against the local mock upstream.
+
+For each user profile a fresh ``benchmarks.mock_upstream`` server is started
+and ``ExtractFinancialDataService.extract_data`` runs for many distinct users
+with a fixed number in flight. Reports p50/p95/p99 latency per extraction,
+throughput and the peak Python heap while one round of concurrent extractions
+runs. Service settings are read from the environment as usual.
+
+Run with ``python -m benchmarks.bench_extraction``; ``--save results.json``
+records a run and ``--baseline results.json`` compares against one.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, List, Optional
+
+import httpx
+from cryptography.fernet import Fernet
+
+from benchmarks.mock_upstream import UpstreamProfile
+
+PORT = int(os.getenv("MOCK_UPSTREAM_PORT", "8001"))
+# Consents are cached per user document, so documents must not repeat across
+# mock servers (or across runs, with a shared cache backend)
+RUN_ID = uuid.uuid4().hex[:8]
+
+# Must be in place before the app reads its settings
+os.environ.setdefault("UPSTREAM_BASE_URL", f"http://127.0.0.1:{PORT}")
+os.environ.setdefault("CRYPTOGRAPHY_KEY", Fernet.generate_key().decode())
+
+from app.core.http_client import http_pool  # noqa: E402
+from app.schemas.schemas import ExtractRequest  # noqa: E402
+from app.services.service import ExtractFinancialDataService  # noqa: E402
+
+
+@dataclass
+class UserProfile:
+    name: str
+    upstream: UpstreamProfile
+    users: int
+    concurrency: int
+
+
+PROFILES = [
+    UserProfile(
+        "small",
+        UpstreamProfile(accounts_per_user=1, transactions_per_account=50),
+        60,
+        10,
+    ),
+    UserProfile("typical", UpstreamProfile(), 30, 10),
+    UserProfile(
+        "heavy",
+        UpstreamProfile(
+            accounts_per_user=10, transactions_per_account=3000, page_size=100
+        ),
+        6,
+        3,
+    ),
+    UserProfile("flaky", UpstreamProfile(timeout_rate=0.05), 30, 10),
+]
+
+
+def extract_request(profile: UserProfile, user: int) -> ExtractRequest:
+    return ExtractRequest(
+        name="Benchmark",
+        organization_name="Benchmark Organization",
+        organization_id=f"bench-{profile.name}",
+        user_document_number=f"{RUN_ID}-{profile.name}-{user}",
+    )
+
+
+def start_upstream(upstream: UpstreamProfile) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.mock_upstream", "--port", str(PORT)]
+    for field in fields(UpstreamProfile):
+        command += [
+            f"--{field.name.replace('_', '-')}",
+            str(getattr(upstream, field.name)),
+        ]
+    process = subprocess.Popen(command)
+
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/dynamic-client/")
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Mock upstream did not start.")
+
+
+async def run_users(profile: UserProfile, users: range) -> List:
+    semaphore = asyncio.Semaphore(profile.concurrency)
+
+    async def extract(user: int) -> float:
+        async with semaphore:
+            started = time.perf_counter()
+            await ExtractFinancialDataService(
+                extract_request(profile, user)
+            ).extract_data()
+            return time.perf_counter() - started
+
+    return await asyncio.gather(
+        *[extract(user) for user in users], return_exceptions=True
+    )
+
+
+def latency_percentiles(latencies: List[float]) -> Dict:
+    """p50/p95/p99 in ms; empty when no extraction succeeded."""
+    if not latencies:
+        return {}
+    if len(latencies) == 1:
+        # quantiles() needs two data points
+        cuts = latencies * 99
+    else:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+async def measure(profile: UserProfile) -> Dict:
+    try:
+        started = time.perf_counter()
+        results = await run_users(profile, range(profile.users))
+        elapsed = time.perf_counter() - started
+
+        latencies = [result for result in results if isinstance(result, float)]
+
+        # A separate round, since tracing allocations slows everything down
+        tracemalloc.start()
+        await run_users(
+            profile, range(profile.users, profile.users + profile.concurrency)
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        await http_pool.aclose()
+
+    transactions = (
+        len(latencies)
+        * profile.upstream.accounts_per_user
+        * profile.upstream.transactions_per_account
+    )
+    return {
+        **latency_percentiles(latencies),
+        "extractions_per_s": len(latencies) / elapsed,
+        "transactions_per_s": transactions / elapsed,
+        "failures": len(results) - len(latencies),
+        "peak_heap_mib": peak / 2**20,
+    }
+
+
+def report(name: str, result: Dict, baseline: Optional[Dict]):
+    print(f"  {name}")
+    if "p50_ms" not in result:
+        print("    no extraction succeeded, so there are no latencies")
+    for metric, value in result.items():
+        line = f"    {metric:<20} {value:10.1f}"
+        if baseline and baseline.get(metric):
+            change = (value - baseline[metric]) / baseline[metric] * 100
+            line += f"   ({change:+.1f}% vs baseline)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", action="append", help="Run only these profiles")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with results saved earlier")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = {}
+    for profile in PROFILES:
+        if args.profile and profile.name not in args.profile:
+            continue
+        print(
+            f"Profile {profile.name}: {profile.users} users, {asdict(profile.upstream)}"
+        )
+
+        upstream = start_upstream(profile.upstream)
+        try:
+            results[profile.name] = asyncio.run(measure(profile))
+        finally:
+            upstream.terminate()
+            upstream.wait()
+        report(profile.name, results[profile.name], baseline.get(profile.name))
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
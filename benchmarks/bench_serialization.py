@@ -0,0 +1,89 @@
+"""Compare response serialization strategies on a large extraction.
+
+Run with ``python -m benchmarks.bench_serialization``.
+"""
+
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import ModelJSONResponse
+from app.schemas.schemas import Account, Balance, Response, Summary, Transactions
+
+ACCOUNTS = 10
+TRANSACTIONS_PER_ACCOUNT = 5000
+REPEAT = 5
+
+
+def build_response() -> Response:
+    accounts = [
+        Account(
+            account_id=f"acc-{a}",
+            account_type="checking",
+            balance=Balance(amount=1000.0, currency="BRL"),
+            transactions=[
+                Transactions(
+                    transaction_id=f"tx-{a}-{t}",
+                    transaction_type="deposit",
+                    transaction_status="completed",
+                    amount=t * 1.5,
+                    currency="BRL",
+                    direction="in",
+                    description="Transferência",
+                    date="2025-07-11T13:00:00.000Z",
+                )
+                for t in range(TRANSACTIONS_PER_ACCOUNT)
+            ],
+        )
+        for a in range(ACCOUNTS)
+    ]
+    return Response(
+        user_document="00011122233",
+        extraction_date="2025-07-12T13:02:06.320Z",
+        accounts=accounts,
+        summary=Summary(
+            total_accounts=ACCOUNTS,
+            total_transactions=ACCOUNTS * TRANSACTIONS_PER_ACCOUNT,
+            processing_time_ms=0,
+            errors=[],
+        ),
+    )
+
+
+def fastapi_default(response: Response) -> bytes:
+    # What FastAPI does for an endpoint returning a model without a response class
+    return json.dumps(
+        jsonable_encoder(response),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def model_json_response(response: Response) -> bytes:
+    return ModelJSONResponse(response).body
+
+
+def main():
+    response = build_response()
+    total = ACCOUNTS * TRANSACTIONS_PER_ACCOUNT
+    print(f"Serializing {total} transactions, best of {REPEAT}")
+
+    results = {}
+    for name, serialize in (
+        ("jsonable_encoder + json", fastapi_default),
+        ("ModelJSONResponse", model_json_response),
+    ):
+        results[name] = min(
+            timeit.repeat(lambda: serialize(response), number=1, repeat=REPEAT)
+        )
+        print(f"  {name:<25} {results[name] * 1000:8.1f} ms")
+
+    speedup = results["jsonable_encoder + json"] / results["ModelJSONResponse"]
+    print(f"  speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Measure app import and startup time in fresh interpreters.
+
+Each run imports ``app.api.api`` in a new process and then enters the app
+lifespan, which builds the lazily created services. ``-X importtime`` output
+splits the import into the app's own modules and third-party ones.
+
+Run with ``python -m benchmarks.bench_startup``. Exits with status 1 when the
+median import or the app's own modules go over budget, so it can gate CI.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from cryptography.fernet import Fernet
+
+RUNS = 7
+
+SCRIPT = """
+import asyncio, time
+started = time.perf_counter()
+import app.api.api as api
+imported = time.perf_counter()
+
+async def startup():
+    async with api.app.router.lifespan_context(api.app):
+        pass
+
+asyncio.run(startup())
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def run_once(env: Dict[str, str]) -> Tuple[float, float, Dict[str, float]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    import_s, startup_s = map(float, result.stdout.split())
+
+    # "import time: self [us] | cumulative | imported package"
+    self_us = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, _, module = line[len("import time:") :].split("|")
+        top_level = module.strip().split(".")[0]
+        self_us[top_level] += float(own)
+    return import_s, startup_s, self_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument(
+        "--max-import-ms",
+        type=float,
+        default=2000,
+        help="Budget for the median import of app.api.api",
+    )
+    parser.add_argument(
+        "--max-app-ms",
+        type=float,
+        default=150,
+        help="Budget for the app's own modules (self time, median)",
+    )
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("CRYPTOGRAPHY_KEY", Fernet.generate_key().decode())
+
+    imports, startups, app_ms = [], [], []
+    packages = defaultdict(list)
+    for _ in range(args.runs):
+        import_s, startup_s, self_us = run_once(env)
+        imports.append(import_s * 1000)
+        startups.append(startup_s * 1000)
+        app_ms.append(self_us.pop("app", 0.0) / 1000)
+        for package, us in self_us.items():
+            packages[package].append(us / 1000)
+
+    import_ms = statistics.median(imports)
+    own_ms = statistics.median(app_ms)
+    print(f"Import and startup of app.api.api, median of {args.runs}")
+    print(f"  {'import':<24} {import_ms:8.1f} ms  (budget {args.max_import_ms:.0f})")
+    print(f"  {'  app modules':<24} {own_ms:8.1f} ms  (budget {args.max_app_ms:.0f})")
+    print(f"  {'lifespan startup':<24} {statistics.median(startups):8.1f} ms")
+    print("Heaviest third-party packages (self time)")
+    heaviest = sorted(
+        packages.items(), key=lambda item: statistics.median(item[1]), reverse=True
+    )
+    for package, samples in heaviest[:8]:
+        print(f"  {package:<24} {statistics.median(samples):8.1f} ms")
+
+    if import_ms > args.max_import_ms or own_ms > args.max_app_ms:
+        print("Import time over budget.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Local stand-in for the Open Finance API, for benchmarks and manual runs.
+
+Serves ``/dynamic-client/``, ``/consent/``, ``/account/`` and the per-account
+``/balance/`` and ``/transactions/`` routes with the same payload shapes as
+upstream. Accounts and transactions are generated deterministically from the
+profile, every request waits for a sampled latency and a configurable share
+of requests is answered with ``504``.
+
+Run with ``python -m benchmarks.mock_upstream --port 8001`` and point the
+service at it with ``UPSTREAM_BASE_URL=http://127.0.0.1:8001``.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import Response
+
+BASE_DATE = datetime(2025, 7, 12, 12, 0, tzinfo=timezone.utc)
+
+
+@dataclass
+class UpstreamProfile:
+    accounts_per_user: int = 3
+    transactions_per_account: int = 500
+    page_size: int = 50
+    # Per-request latency is log-normal around the median; sigma 0 is fixed
+    latency_ms: float = 20.0
+    latency_sigma: float = 0.5
+    # Share of requests answered with 504 instead of being served
+    timeout_rate: float = 0.0
+    seed: int = 0
+
+    def sample_latency_s(self, rng: random.Random) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000
+        return rng.lognormvariate(math.log(self.latency_ms), self.latency_sigma) / 1000
+
+
+def paginate(total: int, page: int, page_size: int, item: Callable[[int], Dict]):
+    start = (page - 1) * page_size
+    end = min(start + page_size, total)
+    return {
+        "items": [item(index) for index in range(start, end)],
+        "page": page,
+        "has_next": end < total,
+        "total": total,
+    }
+
+
+def make_transaction(account_id: str, index: int) -> Dict:
+    incoming = index % 3 != 0
+    return {
+        "id": f"{account_id}-tx-{index}",
+        "account_id": account_id,
+        "transaction_type": "deposit" if incoming else "withdrawal",
+        "transaction_date": (BASE_DATE - timedelta(hours=index)).isoformat()[:19]
+        + ".000Z",
+        "transaction_amount": round(10 + (index * 7.31) % 990, 2),
+        "transaction_description": f"Transaction {index}",
+        "transaction_status": "completed",
+        "transaction_direction": "in" if incoming else "out",
+    }
+
+
+def create_app(profile: Optional[UpstreamProfile] = None) -> FastAPI:
+    profile = profile or UpstreamProfile()
+    rng = random.Random(profile.seed)
+
+    clients: Dict[str, Dict] = {}
+    # dynamic client token -> user document -> consent
+    consents: Dict[str, Dict[str, Dict]] = {}
+    accounts: List[Dict] = []
+    accounts_by_id: Dict[str, Dict] = {}
+
+    app = FastAPI(title="Mock Open Finance API")
+
+    @app.middleware("http")
+    async def simulate_network(request: Request, call_next):
+        await asyncio.sleep(profile.sample_latency_s(rng))
+        if profile.timeout_rate and rng.random() < profile.timeout_rate:
+            return Response(status_code=504)
+        return await call_next(request)
+
+    @app.post("/dynamic-client/")
+    async def create_dynamic_client(payload: Dict):
+        client = {**payload, "token": f"dc-{uuid.uuid4()}"}
+        clients[payload.get("organization_id")] = client
+        return client
+
+    @app.get("/dynamic-client/")
+    async def list_dynamic_clients():
+        return list(clients.values())
+
+    @app.post("/consent/")
+    async def create_consent(payload: Dict, authorization: str = Header("")):
+        document = payload.get("user_document_number")
+        consent = {
+            "id": str(uuid.uuid4()),
+            "token": f"ct-{uuid.uuid4()}",
+            "status": "APPROVED",
+            "user_document_number": document,
+        }
+        consents.setdefault(authorization, {})[document] = consent
+
+        for index in range(profile.accounts_per_user):
+            account = {
+                "id": str(uuid.uuid4()),
+                "account_number": str(100000 + len(accounts)),
+                "agency_number": "0001",
+                "bank_code": "999",
+                "account_type": "checking" if index % 2 == 0 else "savings",
+                "consent_id": consent["id"],
+            }
+            accounts.append(account)
+            accounts_by_id[account["id"]] = account
+        return consent
+
+    @app.get("/consent/")
+    async def list_consents(authorization: str = Header("")):
+        return list(consents.get(authorization, {}).values())
+
+    @app.get("/account/")
+    async def list_accounts(page: int = 1, consent_id: Optional[str] = None):
+        matched = accounts
+        if consent_id:
+            matched = [a for a in accounts if a["consent_id"] == consent_id]
+        return paginate(len(matched), page, profile.page_size, matched.__getitem__)
+
+    @app.get("/account/{account_id}/balance/")
+    async def get_balance(account_id: str):
+        if account_id not in accounts_by_id:
+            raise HTTPException(status_code=404)
+        return {
+            "account_id": account_id,
+            "balance": 1000.0,
+            "currency": "BRL",
+            "calculated_at": BASE_DATE.isoformat()[:19] + ".000Z",
+        }
+
+    @app.get("/account/{account_id}/transactions/")
+    async def list_transactions(account_id: str, page: int = 1):
+        if account_id not in accounts_by_id:
+            raise HTTPException(status_code=404)
+        return paginate(
+            profile.transactions_per_account,
+            page,
+            profile.page_size,
+            lambda index: make_transaction(account_id, index),
+        )
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    for field in fields(UpstreamProfile):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}", type=type(field.default)
+        )
+    args = parser.parse_args()
+
+    profile = UpstreamProfile(
+        **{
+            field.name: getattr(args, field.name)
+            for field in fields(UpstreamProfile)
+            if getattr(args, field.name) is not None
+        }
+    )
+
+    uvicorn.run(
+        create_app(profile), host=args.host, port=args.port, log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
-from tests.fixtures import valid_payload
+import json
+from tests.fixtures import valid_payload, response_data
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
 from unittest.mock import patch
 from app.api.api import router
+from app.schemas.schemas import ExtractRequest
+from app.services.jobs import ExtractionJob
 
 app = FastAPI()
 app.include_router(router)
@@ -31,3 +34,160 @@ def test_extract_financial_data_returns_200(mock_extract_data, valid_payload):
     assert body["summary"]["total_accounts"] == 0
 
     mock_extract_data.assert_called_once()
+
+
+async def fake_records():
+    yield {"type": "account", "data": {"account_id": "acc1"}}
+    yield {"type": "summary", "data": {"summary": {"total_accounts": 1}}}
+
+
+@patch("app.api.api.ExtractFinancialDataService.stream_data")
+def test_stream_financial_data_returns_ndjson(mock_stream_data, valid_payload):
+    mock_stream_data.return_value = fake_records()
+
+    response = client.post("/extract-financial-data/stream", json=valid_payload)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in lines] == ["account", "summary"]
+
+
+@patch("app.api.api.ExtractFinancialDataService.extract_data")
+@patch("app.api.api.ExtractFinancialDataService.stream_data")
+def test_extract_financial_data_streams_when_ndjson_accepted(
+    mock_stream_data, mock_extract_data, valid_payload
+):
+    mock_stream_data.return_value = fake_records()
+
+    response = client.post(
+        "/extract-financial-data",
+        json=valid_payload,
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 2
+    mock_extract_data.assert_not_called()
+
+
+@patch("app.api.api.ExtractFinancialDataService.extract_data")
+def test_extract_financial_data_serializes_model_directly(
+    mock_extract_data, valid_payload, response_data
+):
+    mock_extract_data.return_value = response_data
+
+    response = client.post("/extract-financial-data", json=valid_payload)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == response_data.model_dump_json().encode()
+
+
+@patch("app.api.api.BatchExtractFinancialDataService.extract_data")
+def test_batch_extract_financial_data_returns_200(mock_extract_data, valid_payload):
+    mock_extract_data.return_value = {
+        "results": [],
+        "summary": {"total": 0, "succeeded": 0, "failed": 0, "processing_time_ms": 1},
+    }
+
+    response = client.post(
+        "/extract-financial-data/batch", json={"requests": [valid_payload]}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["summary"]["total"] == 0
+    mock_extract_data.assert_called_once()
+
+
+@patch("app.schemas.schemas.settings.batch_max_size", 2)
+@patch("app.api.api.BatchExtractFinancialDataService.extract_data")
+def test_batch_over_max_size_is_rejected(mock_extract_data, valid_payload):
+    response = client.post(
+        "/extract-financial-data/batch",
+        json={
+            "requests": [valid_payload],
+            "organization": valid_payload,
+            "user_document_numbers": ["111", "222"],
+        },
+    )
+
+    assert response.status_code == 422
+    mock_extract_data.assert_not_called()
+
+
+@patch("app.api.api.job_queue.submit")
+def test_submit_extraction_job_returns_202(mock_submit, valid_payload):
+    job = ExtractionJob(ExtractRequest(**valid_payload))
+    mock_submit.return_value = job
+
+    response = client.post("/extract-financial-data/jobs", json=valid_payload)
+
+    assert response.status_code == 202
+    assert response.json()["job_id"] == job.id
+    assert response.json()["status"] == "queued"
+
+
+@patch("app.api.api.job_queue.get")
+def test_get_job_result_is_202_while_pending(mock_get, valid_payload):
+    mock_get.return_value = ExtractionJob(ExtractRequest(**valid_payload))
+
+    response = client.get("/extract-financial-data/jobs/some-id/result")
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+
+
+@patch("app.api.api.ExtractFinancialDataService.extract_data")
+def test_extract_financial_data_returns_only_requested_fields(
+    mock_extract_data, valid_payload, response_data
+):
+    mock_extract_data.return_value = response_data
+
+    response = client.post(
+        "/extract-financial-data",
+        json={**valid_payload, "fields": ["transaction_id", "amount"]},
+    )
+
+    assert response.status_code == 200
+    transactions = response.json()["accounts"][0]["transactions"]
+    assert transactions
+    assert all(set(tx) == {"transaction_id", "amount"} for tx in transactions)
+
+
+def test_extract_financial_data_rejects_invalid_filters(valid_payload):
+    unknown_field = client.post(
+        "/extract-financial-data", json={**valid_payload, "fields": ["balance"]}
+    )
+    reversed_dates = client.post(
+        "/extract-financial-data",
+        json={**valid_payload, "date_from": "2025-07-10", "date_to": "2025-07-01"},
+    )
+
+    assert unknown_field.status_code == 422
+    assert reversed_dates.status_code == 422
+
+
+@patch("app.api.api.ExtractFinancialDataService.extract_data", autospec=True)
+def test_extract_financial_data_sends_server_timing(
+    mock_extract_data, valid_payload, response_data
+):
+    async def extract_data(service, force_refresh=False):
+        service.timings.add_stage("consent", 0.0042)
+        service.timings.add_stage("total", 0.0105)
+        return response_data
+
+    mock_extract_data.side_effect = extract_data
+
+    response = client.post("/extract-financial-data", json=valid_payload)
+
+    assert response.headers["server-timing"] == "consent;dur=4.2, total;dur=10.5"
+
+
+def test_metrics_are_exposed_in_prometheus_format():
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE ofda_upstream_requests_total counter" in response.text
+    assert 'ofda_cache_hits_total{namespace="consent"}' in response.text
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+
+from app.schemas.schemas import BatchExtractRequest, Organization
+from app.services.batch_service import BatchExtractFinancialDataService
+from tests.fixtures import response_data
+
+
+@patch("app.services.batch_service.settings.batch_concurrency", 2)
+@patch("app.services.service.ExtractFinancialDataService.extract_data", autospec=True)
+@patch(
+    "app.services.service.ExtractFinancialDataService.get_dynamic_client_token",
+    autospec=True,
+)
+@pytest.mark.anyio
+async def test_batch_shares_token_and_isolates_failures(
+    mock_get_dynamic_token, mock_extract_data, response_data
+):
+    mock_get_dynamic_token.return_value = "dynamic-token"
+    in_flight = 0
+    peak_in_flight = 0
+
+    async def fake_extract(service):
+        nonlocal in_flight, peak_in_flight
+        assert service.dynamic_token == "dynamic-token"
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if service.data_source.user_document_number == "bad":
+            raise HTTPException(status_code=404)
+        return response_data
+
+    mock_extract_data.side_effect = fake_extract
+    batch = BatchExtractRequest(
+        organization=Organization(
+            name="Meu app", organization_name="Minha Org", organization_id="org123"
+        ),
+        user_document_numbers=["doc1", "bad", "doc2", "doc3"],
+    )
+
+    result = await BatchExtractFinancialDataService(batch).extract_data()
+
+    assert [item.user_document for item in result.results] == [
+        "doc1",
+        "bad",
+        "doc2",
+        "doc3",
+    ]
+    assert result.results[1].response is None
+    assert result.results[1].error.status_code == 404
+    assert result.results[0].response == response_data
+    assert (result.summary.succeeded, result.summary.failed) == (3, 1)
+    assert mock_get_dynamic_token.call_count == 1
+    assert peak_in_flight == 2
+
+
+@patch(
+    "app.services.service.ExtractFinancialDataService.get_dynamic_client_token",
+    autospec=True,
+)
+@pytest.mark.anyio
+async def test_batch_reports_token_failure_for_every_user_of_the_org(
+    mock_get_dynamic_token,
+):
+    mock_get_dynamic_token.side_effect = HTTPException(status_code=500)
+    batch = BatchExtractRequest(
+        organization=Organization(
+            name="Meu app", organization_name="Minha Org", organization_id="org123"
+        ),
+        user_document_numbers=["doc1", "doc2"],
+    )
+
+    result = await BatchExtractFinancialDataService(batch).extract_data()
+
+    assert [item.error.status_code for item in result.results] == [502, 502]
+    assert result.summary.failed == 2
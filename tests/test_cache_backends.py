@@ -0,0 +1,160 @@
+import fnmatch
+import socketserver
+import threading
+import time
+
+import pytest
+from unittest.mock import patch
+
+from app.core.cache_backends import FileBackend, InMemoryBackend, RedisBackend
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of the Redis protocol to exercise RedisBackend."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.data = {}
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def bulk(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            if command == b"SET":
+                expires_at = time.time() + int(args[4]) / 1000
+                data[args[1]] = (args[2], expires_at)
+                reply = b"+OK\r\n"
+            elif command == b"GET":
+                value, expires_at = data.get(args[1], (None, 0))
+                reply = self.bulk(value if expires_at > time.time() else None)
+            elif command == b"DEL":
+                removed = sum(data.pop(key, None) is not None for key in args[1:])
+                reply = b":%d\r\n" % removed
+            elif command == b"SCAN":
+                pattern = args[3].decode()
+                keys = [k for k in data if fnmatch.fnmatch(k.decode(), pattern)]
+                reply = b"*2\r\n" + self.bulk(b"0") + b"*%d\r\n" % len(keys)
+                reply += b"".join(self.bulk(key) for key in keys)
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def redis_url():
+    server = RespStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def test_in_memory_backend_counts_hits_misses_and_evictions():
+    backend = InMemoryBackend("consent", maxsize=2, ttl=60)
+
+    backend.set("a", b"1")
+    backend.set("b", b"2")
+    backend.set("c", b"3")
+
+    assert backend.get("a") is None
+    assert backend.get("c") == b"3"
+    stats = backend.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+
+
+def test_file_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_a = FileBackend("dynamic_client", maxsize=2, ttl=60, path=path)
+    worker_b = FileBackend("dynamic_client", maxsize=2, ttl=60, path=path)
+
+    worker_a.set("org1", b"token1")
+    assert worker_b.get("org1") == b"token1"
+
+    worker_a.set("org2", b"token2")
+    worker_a.set("org3", b"token3")
+    assert worker_a.evictions == 1
+    assert worker_b.get("org1") is None
+
+
+def test_file_backend_expires_entries(tmp_path):
+    backend = FileBackend("consent", maxsize=10, ttl=-1, path=str(tmp_path / "c.db"))
+
+    backend.set("doc", b"consent")
+
+    assert backend.get("doc") is None
+    assert backend.evictions == 1
+
+
+def test_redis_backend_against_resp_stand_in(redis_url):
+    backend = RedisBackend("extraction", maxsize=100, ttl=60, url=redis_url)
+    other = RedisBackend("consent", maxsize=100, ttl=60, url=redis_url)
+
+    backend.set("org:doc", b"\x00payload\r\n")
+    other.set("org:doc", b"other")
+
+    assert backend.get("org:doc") == b"\x00payload\r\n"
+    assert backend.get("missing") is None
+
+    backend.clear()
+    assert backend.get("org:doc") is None
+    assert other.get("org:doc") == b"other"
+    assert (backend.hits, backend.misses) == (1, 2)
+
+
+@pytest.mark.anyio
+async def test_blocking_backends_run_off_the_event_loop(tmp_path):
+    backend = FileBackend("consent", maxsize=10, ttl=60, path=str(tmp_path / "c.db"))
+    threads = []
+    get = backend.get
+
+    def tracking_get(key):
+        threads.append(threading.get_ident())
+        return get(key)
+
+    backend.get = tracking_get
+    await backend.aset("doc", b"consent")
+
+    assert await backend.aget("doc") == b"consent"
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_redis_failure_closes_the_socket_and_is_a_miss(redis_url):
+    backend = RedisBackend("consent", maxsize=100, ttl=60, url=redis_url)
+    backend.set("doc", b"consent")
+    sock = backend._sock
+
+    with patch.object(backend, "_send", side_effect=ConnectionError("ERR busy")):
+        assert backend.get("doc") is None
+    assert sock.fileno() == -1
+
+    # Reconnects on the next command
+    assert backend.get("doc") == b"consent"
+
+    backend.port = 1  # nothing listens there
+    backend._close()
+    assert backend.get("doc") is None
+    assert backend.misses == 2
@@ -0,0 +1,67 @@
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from app.core.ciphers import AesGcmCipher, FernetCipher, MultiCipher, load_cipher
+from app.core.encrypted_cache import cache
+
+
+def test_aes_gcm_round_trips_raw_bytes():
+    cipher = AesGcmCipher(AesGcmCipher.generate_key())
+
+    token = cipher.encrypt(b"consent-token\nconsent-id")
+
+    assert cipher.decrypt(token) == b"consent-token\nconsent-id"
+    assert len(token) == len(b"consent-token\nconsent-id") + 28
+
+
+def test_aes_gcm_rejects_tampered_tokens():
+    cipher = AesGcmCipher(AesGcmCipher.generate_key())
+    token = bytearray(cipher.encrypt(b"payload"))
+    token[-1] ^= 1
+
+    with pytest.raises(InvalidToken):
+        cipher.decrypt(bytes(token))
+
+
+def test_multi_cipher_reads_entries_written_before_rotation():
+    old = FernetCipher(Fernet.generate_key().decode())
+    new = AesGcmCipher(AesGcmCipher.generate_key())
+    written_before = old.encrypt(b"payload")
+
+    rotated = MultiCipher([new, old])
+
+    assert rotated.decrypt(written_before) == b"payload"
+    assert new.decrypt(rotated.encrypt(b"payload")) == b"payload"
+    with pytest.raises(InvalidToken):
+        MultiCipher([new]).decrypt(written_before)
+
+
+def test_load_cipher_keeps_fernet_and_previous_keys_readable(monkeypatch):
+    current_fernet = Fernet.generate_key().decode()
+    previous_fernet = Fernet.generate_key().decode()
+    monkeypatch.setenv("CRYPTOGRAPHY_KEY", current_fernet)
+    monkeypatch.setenv("CACHE_AESGCM_KEY", AesGcmCipher.generate_key())
+    monkeypatch.setenv("CACHE_PREVIOUS_KEYS", f"fernet:{previous_fernet}")
+
+    cipher = load_cipher("aes-gcm")
+
+    assert isinstance(cipher.ciphers[0], AesGcmCipher)
+    assert cipher.decrypt(Fernet(current_fernet).encrypt(b"a")) == b"a"
+    assert cipher.decrypt(Fernet(previous_fernet).encrypt(b"b")) == b"b"
+
+
+def test_load_cipher_requires_the_primary_key(monkeypatch):
+    monkeypatch.delenv("CACHE_AESGCM_KEY", raising=False)
+
+    with pytest.raises(ValueError):
+        load_cipher("aes-gcm")
+
+
+@pytest.mark.anyio
+async def test_consent_is_stored_as_a_single_encrypted_blob():
+    await cache.set_consent("cipher-user", "consent-token", "consent-id")
+
+    stored = cache.consent_cache.get("cipher-user")
+
+    assert cache.cipher.decrypt(stored) == b"consent-token\nconsent-id"
+    assert await cache.get_consent("cipher-user") == ("consent-token", "consent-id")
@@ -0,0 +1,125 @@
+import asyncio
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.clients.clients import Clients
+from app.clients.consents import Consents
+from app.clients.listing_index import ListingIndex
+from app.core.encrypted_cache import cache
+from tests.fixtures import extract_request
+
+
+def listing(entries):
+    async def fake_request(method, url, **kwargs):
+        if method == "POST":
+            return httpx.Response(200, json={"token": "new-token"})
+        return httpx.Response(200, json=entries)
+
+    return fake_request
+
+
+@patch("app.clients.clients.request_with_retry")
+@pytest.mark.anyio
+async def test_dynamic_client_lookups_use_one_listing(mock_request):
+    mock_request.side_effect = listing(
+        [
+            {"organization_id": "org1", "token": "token1"},
+            {"organization_id": "org2", "token": "token2"},
+        ]
+    )
+    clients = Clients()
+
+    assert await clients.get_dynamic_client_token("org1") == "token1"
+    assert await clients.get_dynamic_client_token("org2") == "token2"
+    assert mock_request.call_count == 1
+
+
+@patch("app.clients.clients.request_with_retry")
+@pytest.mark.anyio
+async def test_created_dynamic_client_is_indexed(mock_request, extract_request):
+    mock_request.side_effect = listing([])
+    clients = Clients()
+
+    assert await clients.get_dynamic_client_token("org123") is None
+    await clients.create_dynamic_client_token(extract_request)
+
+    assert await clients.get_dynamic_client_token("org123") == "new-token"
+    assert [call.args[0] for call in mock_request.call_args_list] == ["GET", "POST"]
+
+
+@patch("app.clients.listing_index.time.monotonic")
+@patch("app.clients.clients.request_with_retry")
+@pytest.mark.anyio
+async def test_miss_refreshes_listing_only_after_min_interval(
+    mock_request, mock_monotonic
+):
+    mock_request.side_effect = listing([])
+    mock_monotonic.return_value = 1000.0
+    clients = Clients()
+
+    await clients.get_dynamic_client_token("org1")
+    await clients.get_dynamic_client_token("org1")
+    assert mock_request.call_count == 1
+
+    mock_monotonic.return_value = 1010.0
+    await clients.get_dynamic_client_token("org1")
+    assert mock_request.call_count == 2
+
+
+@patch("app.clients.consents.request_with_retry")
+@pytest.mark.anyio
+async def test_consent_index_is_scoped_per_token(mock_request):
+    async def fake_request(method, url, headers=None, **kwargs):
+        document = "doc-a" if headers["Authorization"] == "token-a" else "doc-b"
+        return httpx.Response(
+            200,
+            json=[
+                {
+                    "user_document_number": document,
+                    "status": "APPROVED",
+                    "token": f"consent-{document}",
+                    "id": f"id-{document}",
+                }
+            ],
+        )
+
+    mock_request.side_effect = fake_request
+    consents = Consents()
+
+    assert await consents.get_consent("doc-a", "token-a") == (
+        "consent-doc-a",
+        "id-doc-a",
+    )
+    assert await consents.get_consent("doc-b", "token-b") == (
+        "consent-doc-b",
+        "id-doc-b",
+    )
+    assert await consents.get_consent("doc-a", "token-a") == (
+        "consent-doc-a",
+        "id-doc-a",
+    )
+    assert mock_request.call_count == 2
+
+
+@pytest.mark.anyio
+async def test_listing_index_keeps_entries_encrypted_and_added_during_refresh():
+    index = ListingIndex("organization_id", 300, 5, cache.cipher)
+    listing, listed = asyncio.Event(), asyncio.Event()
+
+    async def slow_listing():
+        listing.set()
+        await listed.wait()
+        return [{"organization_id": "org1", "token": "listed-token"}]
+
+    refresh = asyncio.ensure_future(index.lookup("org1", slow_listing))
+    await listing.wait()
+    index.add({"organization_id": "org2", "token": "created-token"})
+    listed.set()
+
+    assert await refresh == {"organization_id": "org1", "token": "listed-token"}
+    assert await index.lookup("org2", slow_listing) == {
+        "organization_id": "org2",
+        "token": "created-token",
+    }
+    assert all(b"token" not in entry for entry in index._entries.values())
@@ -0,0 +1,220 @@
+import httpx
+import pytest
+from unittest.mock import patch
+from datetime import date
+from fastapi import HTTPException
+
+from app.extractors.extractor import Extractor, extractor
+
+
+def paged_upstream(total_pages, page_size=2, with_total=False):
+    requested = []
+
+    async def fake_request(method, url, headers=None, params=None):
+        page_number = params["page"]
+        requested.append(page_number)
+        if page_number > total_pages:
+            raise HTTPException(status_code=404, detail="Resource not found.")
+
+        body = {
+            "items": [
+                {"id": f"tx{page_number}-{i}", "consent_id": "consent-id"}
+                for i in range(page_size)
+            ],
+            "has_next": page_number < total_pages,
+        }
+        if with_total:
+            body["total"] = total_pages * page_size
+        return httpx.Response(200, json=body)
+
+    return fake_request, requested
+
+
+@patch("app.extractors.extractor.settings.pagination_window", 3)
+@patch("app.extractors.extractor.request_with_retry")
+@pytest.mark.anyio
+async def test_get_account_transactions_walks_pages_in_parallel_windows(
+    mock_request,
+):
+    mock_request.side_effect, requested = paged_upstream(total_pages=6)
+
+    transactions = await extractor.get_account_transactions("token", "acc1")
+
+    assert [tx["id"] for tx in transactions] == [
+        f"tx{page}-{i}" for page in range(1, 7) for i in range(2)
+    ]
+    # Page 7 is a speculative overshoot that 404s and ends the walk
+    assert sorted(requested) == [1, 2, 3, 4, 5, 6, 7]
+
+
+@pytest.mark.parametrize(
+    "overshoot_error",
+    [
+        httpx.TimeoutException("External API returned 504."),
+        HTTPException(status_code=422, detail="Validation error."),
+    ],
+)
+@patch("app.extractors.extractor.settings.pagination_window", 4)
+@patch("app.extractors.extractor.request_with_retry")
+@pytest.mark.anyio
+async def test_failing_pages_past_the_end_do_not_fail_the_walk(
+    mock_request, overshoot_error
+):
+    fake_request, requested = paged_upstream(total_pages=6)
+
+    async def failing_past_the_end(method, url, headers=None, params=None):
+        if params["page"] > 6:
+            raise overshoot_error
+        return await fake_request(method, url, headers, params)
+
+    mock_request.side_effect = failing_past_the_end
+
+    transactions = await extractor.get_account_transactions("token", "acc1")
+
+    assert len(transactions) == 12
+
+
+@patch("app.extractors.extractor.settings.pagination_window", 3)
+@patch("app.extractors.extractor.request_with_retry")
+@pytest.mark.anyio
+async def test_error_before_the_end_still_fails_the_walk(mock_request):
+    fake_request, _ = paged_upstream(total_pages=6)
+
+    async def failing_page_three(method, url, headers=None, params=None):
+        if params["page"] == 3:
+            raise httpx.TimeoutException("External API returned 504.")
+        return await fake_request(method, url, headers, params)
+
+    mock_request.side_effect = failing_page_three
+
+    with pytest.raises(httpx.TimeoutException):
+        await extractor.get_account_transactions("token", "acc1")
+
+
+@patch("app.extractors.extractor.settings.pagination_window", 4)
+@patch("app.extractors.extractor.request_with_retry")
+@pytest.mark.anyio
+async def test_get_account_uses_upstream_total_to_avoid_overshoot(mock_request):
+    mock_request.side_effect, requested = paged_upstream(total_pages=3, with_total=True)
+
+    accounts = await extractor.get_account("token", "consent-id")
+
+    assert len(accounts) == 6
+    assert sorted(requested) == [1, 2, 3]
+
+
+@patch("app.extractors.extractor.settings.pagination_window", 1)
+@patch("app.extractors.extractor.request_with_retry")
+@pytest.mark.anyio
+async def test_date_window_is_sent_upstream_and_stops_paging_past_it(mock_request):
+    # Oldest first, two days per page, from 2025-07-01; the upstream ignores
+    # the date params
+    sent_params = []
+
+    async def fake_request(method, url, headers=None, params=None):
+        sent_params.append(params)
+        page_number = params["page"]
+        body = {
+            "items": [
+                {"id": f"tx{day}", "transaction_date": f"2025-07-{day:02d}T10:00:00"}
+                for day in (2 * page_number - 1, 2 * page_number)
+            ],
+            "has_next": page_number < 10,
+        }
+        return httpx.Response(200, json=body)
+
+    mock_request.side_effect = fake_request
+
+    transactions = await extractor.get_account_transactions(
+        "token", "acc1", date(2025, 7, 4), date(2025, 7, 6)
+    )
+
+    assert [tx["id"] for tx in transactions] == ["tx4", "tx5", "tx6"]
+    assert [params["page"] for params in sent_params] == [1, 2, 3, 4]
+    assert sent_params[0]["date_from"] == "2025-07-04"
+    assert sent_params[0]["date_to"] == "2025-07-06"
+
+
+@patch("app.extractors.extractor.settings.pagination_window", 1)
+@patch("app.extractors.extractor.request_with_retry")
+@pytest.mark.anyio
+async def test_undated_rows_do_not_stop_paging(mock_request):
+    pages = {
+        1: [
+            {"id": "a", "transaction_date": "2025-07-10T10:00:00"},
+            {"id": "b", "transaction_date": "2025-07-09T10:00:00"},
+            {"id": "c", "transaction_date": None},
+        ],
+        2: [{"id": "d", "transaction_date": "2025-07-08T10:00:00"}],
+    }
+
+    async def fake_request(method, url, headers=None, params=None):
+        page_number = params["page"]
+        body = {"items": pages[page_number], "has_next": page_number < 2}
+        return httpx.Response(200, json=body)
+
+    mock_request.side_effect = fake_request
+
+    transactions = await extractor.get_account_transactions(
+        "token", "acc1", date(2025, 7, 1), date(2025, 7, 31)
+    )
+
+    assert [tx["id"] for tx in transactions] == ["a", "b", "d"]
+
+
+@patch("app.extractors.extractor.settings.pagination_window", 1)
+@patch("app.extractors.extractor.request_with_retry")
+@pytest.mark.anyio
+async def test_window_of_one_walks_serially(mock_request):
+    mock_request.side_effect, requested = paged_upstream(total_pages=3)
+
+    transactions = await extractor.get_account_transactions("token", "acc1")
+
+    assert len(transactions) == 6
+    assert requested == [1, 2, 3]
+
+
+@patch("app.extractors.extractor.settings.pagination_window", 1)
+@patch("app.extractors.extractor.request_with_retry")
+@pytest.mark.anyio
+async def test_get_account_indexes_every_consent_from_one_crawl(mock_request):
+    requested_params = []
+
+    async def fake_request(method, url, headers=None, params=None):
+        requested_params.append(params)
+        return httpx.Response(
+            200,
+            json={
+                "items": [
+                    {"id": "acc1", "consent_id": "consent-a"},
+                    {"id": "acc2", "consent_id": "consent-b"},
+                    {"id": "acc3", "consent_id": "consent-a"},
+                ],
+                "has_next": False,
+            },
+        )
+
+    mock_request.side_effect = fake_request
+    extractor = Extractor()
+
+    accounts_a = await extractor.get_account("token", "consent-a")
+    accounts_b = await extractor.get_account("token", "consent-b")
+    accounts_a_again = await extractor.get_account("token", "consent-a")
+
+    assert [account["id"] for account in accounts_a] == ["acc1", "acc3"]
+    assert [account["id"] for account in accounts_b] == ["acc2"]
+    assert accounts_a_again == accounts_a
+    assert requested_params == [{"consent_id": "consent-a", "page": 1}]
+
+
+@patch("app.extractors.extractor.request_with_retry")
+@pytest.mark.anyio
+async def test_get_account_does_not_index_missing_consent(mock_request):
+    mock_request.side_effect, requested = paged_upstream(total_pages=1)
+    extractor = Extractor()
+
+    for _ in range(2):
+        with pytest.raises(Exception, match="Account not found"):
+            await extractor.get_account("token", "unknown-consent")
+
+    assert requested == [1, 1]
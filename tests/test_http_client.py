@@ -0,0 +1,36 @@
+import asyncio
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.core.http_client import HttpClientPool
+
+
+@patch("app.core.http_client.settings.http_max_connections_per_host", 2)
+@patch("httpx.AsyncClient.request")
+@pytest.mark.anyio
+async def test_pool_reuses_client_and_limits_per_host(mock_request):
+    pool = HttpClientPool()
+
+    async def slow_response(method, url, **kwargs):
+        await asyncio.sleep(0.01)
+        return httpx.Response(200)
+
+    mock_request.side_effect = slow_response
+
+    client = pool._get_client()
+    await asyncio.gather(
+        *[pool.request("GET", f"http://upstream/account/?page={i}") for i in range(5)]
+    )
+
+    assert pool._get_client() is client
+    stats = pool.stats()
+    assert stats["total_requests"] == 5
+    assert stats["in_flight"] == 0
+    assert stats["peak_in_flight"] == 2
+    assert stats["in_flight_per_host"] == {"upstream": 0}
+
+    await pool.aclose()
+    assert pool._get_client() is not client
+    await pool.aclose()
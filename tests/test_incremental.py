@@ -0,0 +1,96 @@
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.core.encrypted_cache import cache
+from app.extractors.incremental import incremental_sync
+
+
+class GrowingUpstream:
+    """Transactions endpoint whose history only grows at the end."""
+
+    def __init__(self, total, page_size=3):
+        self.transactions = [self.transaction(i) for i in range(total)]
+        self.page_size = page_size
+        self.requested = []
+
+    @staticmethod
+    def transaction(i):
+        return {"id": f"tx{i}", "transaction_date": f"2025-07-{i + 1:02d}"}
+
+    def grow(self, count):
+        start = len(self.transactions)
+        self.transactions += [self.transaction(i) for i in range(start, start + count)]
+
+    async def request(self, method, url, headers=None, params=None):
+        page_number = params["page"]
+        self.requested.append(page_number)
+        start = (page_number - 1) * self.page_size
+        items = self.transactions[start : start + self.page_size]
+        has_next = start + self.page_size < len(self.transactions)
+        return httpx.Response(200, json={"items": items, "has_next": has_next})
+
+
+@pytest.fixture
+def upstream():
+    cache.transaction_history_cache.clear()
+    upstream = GrowingUpstream(total=8)
+    with patch("app.extractors.extractor.settings.pagination_window", 1), patch(
+        "app.extractors.extractor.request_with_retry", side_effect=upstream.request
+    ):
+        yield upstream
+    cache.transaction_history_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_repeat_sync_only_fetches_new_pages(upstream):
+    first = await incremental_sync.get_account_transactions("token", "acc1")
+    assert [tx["id"] for tx in first] == [f"tx{i}" for i in range(8)]
+    assert upstream.requested == [1, 2, 3]
+
+    upstream.requested.clear()
+    upstream.grow(5)
+
+    second = await incremental_sync.get_account_transactions("token", "acc1")
+
+    assert [tx["id"] for tx in second] == [f"tx{i}" for i in range(13)]
+    assert upstream.requested == [3, 4, 5]
+
+
+@pytest.mark.anyio
+async def test_sync_falls_back_to_full_crawl_when_history_changes(upstream):
+    await incremental_sync.get_account_transactions("token", "acc1")
+
+    upstream.requested.clear()
+    upstream.transactions = [
+        {"id": f"new{i}", "transaction_date": "2025-08-01"} for i in range(4)
+    ]
+
+    transactions = await incremental_sync.get_account_transactions("token", "acc1")
+
+    assert [tx["id"] for tx in transactions] == [f"new{i}" for i in range(4)]
+    assert upstream.requested == [3, 1, 2]
+
+
+@pytest.mark.anyio
+async def test_newest_first_history_only_fetches_the_head(upstream):
+    oldest_first = upstream.transactions
+
+    async def newest_first(method, url, headers=None, params=None):
+        upstream.transactions = oldest_first[::-1]
+        try:
+            return await GrowingUpstream.request(upstream, method, url, params=params)
+        finally:
+            upstream.transactions = oldest_first
+
+    with patch("app.extractors.extractor.request_with_retry", newest_first):
+        first = await incremental_sync.get_account_transactions("token", "acc1")
+        assert [tx["id"] for tx in first] == [f"tx{i}" for i in range(7, -1, -1)]
+
+        upstream.requested.clear()
+        upstream.grow(2)
+
+        second = await incremental_sync.get_account_transactions("token", "acc1")
+
+    assert [tx["id"] for tx in second] == [f"tx{i}" for i in range(9, -1, -1)]
+    assert upstream.requested == [1]
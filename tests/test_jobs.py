@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+
+from app.core.resilience import deadline_remaining
+from app.services.jobs import ExtractionJobQueue
+from tests.fixtures import extract_request, response_data
+
+
+@patch("app.services.service.ExtractFinancialDataService.extract_data", autospec=True)
+@pytest.mark.anyio
+async def test_job_runs_in_background_and_reports_progress(
+    mock_extract_data, extract_request, response_data
+):
+    release = asyncio.Event()
+
+    async def fake_extract(service):
+        service.progress.accounts_total = 2
+        service.progress.accounts_done = 1
+        await release.wait()
+        return response_data
+
+    mock_extract_data.side_effect = fake_extract
+    job_queue = ExtractionJobQueue()
+
+    job = job_queue.submit(extract_request)
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    status = job_queue.get(job.id).describe()
+    assert status.status == "running"
+    assert status.progress.accounts_done == 1
+
+    release.set()
+    await asyncio.sleep(0.01)
+
+    assert job_queue.get(job.id).status == "succeeded"
+    assert job_queue.get(job.id).result == response_data
+    await job_queue.stop()
+
+
+@patch("app.services.jobs.settings.job_queue_maxsize", 1)
+@patch("app.services.jobs.settings.job_workers", 1)
+@patch("app.services.service.ExtractFinancialDataService.extract_data", autospec=True)
+@pytest.mark.anyio
+async def test_full_queue_rejects_with_429(mock_extract_data, extract_request):
+    async def never_finishes(service):
+        await asyncio.Event().wait()
+
+    mock_extract_data.side_effect = never_finishes
+    job_queue = ExtractionJobQueue()
+
+    job_queue.submit(extract_request)
+    await asyncio.sleep(0)
+    job_queue.submit(extract_request)
+
+    with pytest.raises(HTTPException) as exc:
+        job_queue.submit(extract_request)
+
+    assert exc.value.status_code == 429
+    await job_queue.stop()
+
+
+@patch("app.services.service.ExtractFinancialDataService.extract_data", autospec=True)
+@pytest.mark.anyio
+async def test_failed_job_keeps_mapped_error(mock_extract_data, extract_request):
+    mock_extract_data.side_effect = HTTPException(status_code=404)
+    job_queue = ExtractionJobQueue()
+
+    job = job_queue.submit(extract_request)
+    await asyncio.sleep(0.01)
+
+    assert job.status == "failed"
+    assert job.error.status_code == 404
+    await job_queue.stop()
+
+
+@patch("app.services.jobs.settings.job_deadline_s", 60.0)
+@patch("app.services.service.settings.extraction_deadline_s", 0.01)
+@patch(
+    "app.services.service.ExtractFinancialDataService."
+    "_ExtractFinancialDataService__get_accounts"
+)
+@pytest.mark.anyio
+async def test_job_is_not_cut_off_at_the_request_deadline(
+    mock_get_accounts, extract_request
+):
+    async def slow_accounts():
+        await asyncio.sleep(0.05)
+        if deadline_remaining() <= 0:
+            raise HTTPException(status_code=504)
+        return "consent-token", []
+
+    mock_get_accounts.side_effect = slow_accounts
+    job_queue = ExtractionJobQueue()
+
+    job = job_queue.submit(extract_request)
+    while job.finished_at is None:
+        await asyncio.sleep(0.01)
+
+    assert job.status == "succeeded", job.error
+    await job_queue.stop()
+
+
+@patch("app.services.jobs.settings.job_ttl_s", 0)
+@pytest.mark.anyio
+async def test_finished_jobs_expire(extract_request):
+    job_queue = ExtractionJobQueue()
+    job = job_queue.submit(extract_request)
+    job.finished_at = 1.0
+
+    with pytest.raises(HTTPException) as exc:
+        job_queue.get(job.id)
+
+    assert exc.value.status_code == 404
+    await job_queue.stop()
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+from app.core.lazy import Lazy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Service:
+    instances = 0
+
+    def __init__(self):
+        Service.instances += 1
+        self.name = "service"
+
+
+def test_lazy_builds_the_instance_once_on_first_use():
+    Service.instances = 0
+    service = Lazy(Service)
+
+    assert not service.initialized
+    assert Service.instances == 0
+
+    assert service.name == "service"
+    assert service.get() is service.get()
+    assert Service.instances == 1
+
+
+def test_importing_the_app_builds_no_services():
+    # No CRYPTOGRAPHY_KEY: building the cache at import would raise
+    env = {k: v for k, v in os.environ.items() if k != "CRYPTOGRAPHY_KEY"}
+    script = (
+        "import app.api.api\n"
+        "from app.core.encrypted_cache import cache\n"
+        "from app.normalizers.normalizer import normalizer\n"
+        "assert not cache.initialized and not normalizer.initialized\n"
+    )
+
+    result = subprocess.run([sys.executable, "-c", script], env=env, cwd=ROOT)
+
+    assert result.returncode == 0
@@ -0,0 +1,39 @@
+import pytest
+from cryptography.fernet import Fernet
+
+from app.core.local_store import LocalStore
+from tests.fixtures import response_data
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalStore(str(tmp_path / "store.db"), Fernet(Fernet.generate_key()))
+
+
+def test_extraction_round_trip(store, response_data):
+    payload = response_data.model_dump()
+
+    store.save_extraction("org123", "00011122233", payload)
+    stored, age_ms = store.load_extraction("org123", "00011122233", max_age_s=60)
+
+    assert stored == payload
+    assert age_ms >= 0
+
+
+def test_undated_transactions_round_trip(store, response_data):
+    payload = response_data.model_dump()
+    payload["accounts"][0]["transactions"][0]["date"] = None
+
+    store.save_extraction("org123", "00011122233", payload)
+    stored, _ = store.load_extraction("org123", "00011122233", max_age_s=60)
+
+    assert stored == payload
+
+
+def test_extraction_older_than_max_age_is_ignored(store, response_data):
+    store.save_extraction("org123", "00011122233", response_data.model_dump())
+
+    assert store.load_extraction("org123", "00011122233", max_age_s=0) == (
+        None,
+        None,
+    )
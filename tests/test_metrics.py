@@ -0,0 +1,49 @@
+from app.core.metrics import Metrics, Timings, timed, timings_scope
+
+
+def test_timings_collect_stages_inside_scope_only():
+    timings = Timings()
+
+    with timings_scope(timings):
+        with timed("consent"):
+            pass
+        with timed("balances"):
+            pass
+        with timed("balances"):
+            pass
+    with timed("balances"):
+        pass
+
+    breakdown = timings.breakdown()
+    assert list(breakdown.stages) == ["consent", "balances"]
+    assert breakdown.stages["balances"].count == 2
+
+
+def test_timings_count_requests_and_retries_per_route():
+    timings = Timings()
+    timings.add_request("GET /account/", 0.02)
+    timings.add_retry("GET /account/")
+    timings.add_request("GET /account/", 0.03)
+    timings.add_cache_lookup("consent", hit=False)
+
+    route = timings.breakdown().upstream["GET /account/"]
+    assert (route.count, route.retries) == (2, 1)
+    assert round(route.duration_ms) == 50
+    assert timings.breakdown().cache["consent"].misses == 1
+
+
+def test_metrics_render_prometheus_text():
+    metrics = Metrics()
+    metrics.observe_request("GET /account/{id}/balance/", "504", 0.5)
+    metrics.observe_retry("GET /account/{id}/balance/")
+    metrics.observe_stage("total", 1.25)
+
+    text = metrics.render({"consent": {"hits": 3, "misses": 1, "evictions": 0}})
+
+    assert (
+        'ofda_upstream_requests_total{route="GET /account/{id}/balance/",status="504"} 1'
+        in text
+    )
+    assert 'ofda_upstream_retries_total{route="GET /account/{id}/balance/"} 1' in text
+    assert 'ofda_stage_duration_seconds_sum{stage="total"} 1.25' in text
+    assert 'ofda_cache_hits_total{namespace="consent"} 3' in text
@@ -1,3 +1,4 @@
+import pytest
 from unittest.mock import patch
 
 from tests.fixtures import (
@@ -9,6 +10,7 @@ from tests.fixtures import (
     response_data,
 )
 from app.normalizers.normalizer import normalizer
+from app.schemas.schemas import Transactions
 
 
 def test_normalize_data(account_data, balance_data, transactions_data, normalized_data):
@@ -23,3 +25,50 @@ def test_create_response(
     mock_extraction_date.return_value = "2025-07-12T18:59:06.594641-03:00Z"
     response = normalizer.create_response(extract_request, 2, 234, 1, [normalized_data])
     assert response == response_data
+
+
+@pytest.mark.anyio
+async def test_normalize_transaction_pages_matches_normalize_data(
+    account_data, balance_data, transactions_data, normalized_data
+):
+    async def pages():
+        for transaction in transactions_data:
+            yield [transaction]
+
+    transactions = await normalizer.normalize_transaction_pages(
+        pages(), balance_data["currency"]
+    )
+    account = normalizer.normalize_account(account_data, balance_data, transactions)
+
+    assert account == normalized_data
+
+
+def test_fast_and_strict_normalization_serialize_identically(
+    account_data, balance_data, transactions_data
+):
+    transactions = transactions_data + [
+        {**transactions_data[0], "id": f"tx-{i}", "transaction_amount": i}
+        for i in range(50)
+    ]
+
+    with patch("app.normalizers.normalizer.settings.normalization_mode", "strict"):
+        strict = normalizer.normalize_data(account_data, balance_data, transactions)
+    with patch("app.normalizers.normalizer.settings.normalization_mode", "fast"):
+        fast = normalizer.normalize_data(account_data, balance_data, transactions)
+
+    assert fast.model_dump_json() == strict.model_dump_json()
+    assert fast == strict
+
+
+def test_fast_normalization_matches_pydantic_instance_layout(transactions_data):
+    # The fast path sets pydantic's instance attributes by hand; if a pydantic
+    # release adds or renames one, this fails instead of production
+    with patch("app.normalizers.normalizer.settings.normalization_mode", "fast"):
+        (fast,) = normalizer.normalize_transactions(transactions_data[:1], "BRL")
+    with patch("app.normalizers.normalizer.settings.normalization_mode", "strict"):
+        (strict,) = normalizer.normalize_transactions(transactions_data[:1], "BRL")
+    constructed = Transactions.model_construct(**strict.model_dump())
+
+    assert fast.__getstate__() == strict.__getstate__()
+    assert set(fast.__getstate__()) == set(constructed.__getstate__())
+    assert fast.model_copy(update={"amount": 1.0}).amount == 1.0
@@ -0,0 +1,102 @@
+import asyncio
+import httpx
+
+import pytest
+from unittest.mock import patch
+
+from tenacity import wait_none
+
+from app.core.rate_limiter import RouteGovernor
+from app.core.resilience import OPEN, circuit_breakers, deadline_scope
+from app.core.retry_utils import request_with_retry
+
+
+@pytest.mark.anyio
+async def test_governor_caps_requests_in_flight():
+    governor = RouteGovernor(rps=0, max_in_flight=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        await governor.acquire("user")
+        peak = max(peak, governor.in_flight)
+        await asyncio.sleep(0.01)
+        governor.release()
+
+    await asyncio.gather(*[call() for _ in range(6)])
+
+    assert peak == 2
+    assert governor.in_flight == 0
+    assert governor.stats()["queued"] == 4
+
+
+@pytest.mark.anyio
+async def test_governor_serves_waiting_keys_round_robin():
+    governor = RouteGovernor(rps=0, max_in_flight=1)
+    order = []
+
+    async def call(key):
+        await governor.acquire(key)
+        order.append(key)
+        await asyncio.sleep(0)
+        governor.release()
+
+    await governor.acquire("holder")
+    # A large extraction queues first, then a small one
+    tasks = [asyncio.ensure_future(call("large")) for _ in range(3)]
+    tasks.append(asyncio.ensure_future(call("small")))
+    await asyncio.sleep(0)
+    governor.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["large", "small", "large", "large"]
+
+
+@pytest.mark.anyio
+async def test_governor_delays_calls_past_the_rate():
+    governor = RouteGovernor(rps=2, max_in_flight=0)
+
+    with patch("app.core.rate_limiter.asyncio.sleep") as mock_sleep:
+        for _ in range(3):
+            await governor.acquire()
+            governor.release()
+
+    # Burst of two, then the third waits for a token
+    assert mock_sleep.call_count == 1
+    assert mock_sleep.call_args.args[0] == pytest.approx(0.5, abs=0.01)
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_gives_up_its_place():
+    governor = RouteGovernor(rps=0, max_in_flight=1)
+    await governor.acquire("a")
+
+    waiter = asyncio.ensure_future(governor.acquire("b"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    governor.release()
+
+    assert governor.in_flight == 0
+    assert governor.stats()["waiting"] == 0
+
+
+@patch("app.core.rate_limiter.RouteGovernor.acquire")
+@pytest.mark.anyio
+async def test_trial_timing_out_in_governor_queue_releases_the_circuit(mock_acquire):
+    async def queued_forever(key=None):
+        await asyncio.sleep(60)
+
+    mock_acquire.side_effect = queued_forever
+    breaker = circuit_breakers.for_route("GET /queued/")
+    breaker.state, breaker.opened_at = OPEN, 0.0
+
+    with deadline_scope(0.05):
+        with pytest.raises(httpx.TimeoutException):
+            await request_with_retry.retry_with(wait=wait_none())(
+                "GET", "http://upstream/queued/"
+            )
+
+    assert breaker.state == OPEN
@@ -0,0 +1,150 @@
+import asyncio
+import httpx
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from tenacity import wait_none
+
+from app.core.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakers,
+    RetryBudget,
+    circuit_breakers,
+    deadline_remaining,
+    deadline_scope,
+)
+from app.core.retry_utils import request_with_retry
+
+request_without_wait = request_with_retry.retry_with(wait=wait_none())
+upstream_request = httpx.Request("GET", "http://upstream/")
+
+
+def test_retry_budget_denies_retries_once_spent():
+    budget = RetryBudget(ratio=0.5, min_tokens=1, max_tokens=10)
+
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+    budget.record_success()
+    budget.record_success()
+
+    assert budget.try_spend()
+    assert budget.stats()["retries_denied"] == 1
+
+
+def test_circuit_breaker_opens_and_recovers_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=30)
+
+    with patch("app.core.resilience.time.monotonic", return_value=100.0):
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+        with pytest.raises(HTTPException) as exc:
+            breaker.before_request("GET /account/")
+        assert exc.value.status_code == 503
+
+    with patch("app.core.resilience.time.monotonic", return_value=131.0):
+        breaker.before_request("GET /account/")
+        assert breaker.state == HALF_OPEN
+
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+
+def test_route_normalizes_resource_ids():
+    assert (
+        CircuitBreakers.route("get", "http://upstream/account/123/transactions/")
+        == "GET /account/{id}/transactions/"
+    )
+    assert (
+        CircuitBreakers.route(
+            "GET", "http://upstream/consent/0f8fad5b-d9cb-469f-a165-70867728950e"
+        )
+        == "GET /consent/{id}"
+    )
+    assert (
+        CircuitBreakers.route("GET", "http://upstream/account/acc1/balance/")
+        == CircuitBreakers.route("GET", "http://upstream/account/abc123/balance/")
+        == "GET /account/{id}/balance/"
+    )
+    assert CircuitBreakers.route("GET", "http://upstream/account/") == "GET /account/"
+
+
+def test_deadline_scope_keeps_earliest_deadline():
+    assert deadline_remaining() is None
+
+    with deadline_scope(5):
+        with deadline_scope(60):
+            assert deadline_remaining() <= 5
+
+    assert deadline_remaining() is None
+
+
+@patch("httpx.AsyncClient.request")
+@pytest.mark.anyio
+async def test_request_with_retry_stops_at_deadline(mock_request):
+    mock_request.return_value = httpx.Response(504, request=upstream_request)
+
+    with deadline_scope(0):
+        with pytest.raises(httpx.TimeoutException):
+            await request_without_wait("GET", "http://upstream/balance/")
+
+    mock_request.assert_not_called()
+
+
+@patch("app.core.retry_utils.retry_budget", RetryBudget(1, 0, 10))
+@patch("httpx.AsyncClient.request")
+@pytest.mark.anyio
+async def test_request_with_retry_gives_up_when_budget_is_empty(mock_request):
+    mock_request.return_value = httpx.Response(504, request=upstream_request)
+
+    with pytest.raises(httpx.TimeoutException):
+        await request_without_wait("GET", "http://upstream/budget/")
+
+    assert mock_request.call_count == 1
+
+
+@patch("httpx.AsyncClient.request")
+@pytest.mark.anyio
+async def test_cancelled_half_open_trial_does_not_leave_circuit_stuck(mock_request):
+    started = asyncio.Event()
+
+    async def hang(*args, **kwargs):
+        started.set()
+        await asyncio.sleep(60)
+
+    mock_request.side_effect = hang
+    breaker = circuit_breakers.for_route("GET /cancelled/")
+    breaker.state, breaker.opened_at = OPEN, 0.0
+
+    trial = asyncio.ensure_future(
+        request_without_wait("GET", "http://upstream/cancelled/")
+    )
+    await started.wait()
+    assert breaker.state == HALF_OPEN
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    assert breaker.state == OPEN
+    mock_request.side_effect = None
+    mock_request.return_value = httpx.Response(200, request=upstream_request)
+    await request_without_wait("GET", "http://upstream/cancelled/")
+    assert breaker.state == CLOSED
+
+
+@patch("httpx.AsyncClient.request")
+@pytest.mark.anyio
+async def test_request_timeout_is_capped_at_the_deadline(mock_request):
+    mock_request.return_value = httpx.Response(200, request=upstream_request)
+
+    with deadline_scope(2):
+        await request_without_wait("GET", "http://upstream/capped/")
+
+    timeout = mock_request.call_args.kwargs["timeout"]
+    assert 0 < timeout.read <= 2
+    assert 0 < timeout.connect <= 2
@@ -0,0 +1,35 @@
+import httpx
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from tenacity import wait_none
+
+from app.core.retry_utils import request_with_retry
+
+request_without_wait = request_with_retry.retry_with(wait=wait_none())
+upstream_request = httpx.Request("GET", "http://upstream/")
+
+
+@patch("httpx.AsyncClient.request")
+@pytest.mark.anyio
+async def test_request_with_retry_retries_on_504(mock_request):
+    mock_request.side_effect = [
+        httpx.Response(504, request=upstream_request),
+        httpx.Response(200, json={"ok": True}, request=upstream_request),
+    ]
+
+    response = await request_without_wait("GET", "http://upstream/account/")
+
+    assert response.json() == {"ok": True}
+    assert mock_request.call_count == 2
+
+
+@patch("httpx.AsyncClient.request")
+@pytest.mark.anyio
+async def test_request_with_retry_maps_404(mock_request):
+    mock_request.return_value = httpx.Response(404, request=upstream_request)
+
+    with pytest.raises(HTTPException) as exc:
+        await request_without_wait("GET", "http://upstream/consent/")
+
+    assert exc.value.status_code == 404
@@ -1,18 +1,40 @@
-from unittest.mock import patch
+import asyncio
+import httpx
+from datetime import date
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi import HTTPException
+from app.core.encrypted_cache import cache
+from app.core.http_client import http_pool
 from app.services.service import ExtractFinancialDataService
-from tests.fixtures import extract_request, response_data, normalized_data
+from benchmarks.mock_upstream import UpstreamProfile, create_app as create_mock_upstream
+from tests.fixtures import (
+    extract_request,
+    response_data,
+    normalized_data,
+    balance_data,
+    transactions_data,
+)
+
+
+def pages_of(*transactions):
+    async def fake_pages(consent_token, account_id, *dates):
+        yield list(transactions)
+
+    return fake_pages
 
 
 @patch("app.normalizers.normalizer.Normalizer.create_response")
-@patch("app.normalizers.normalizer.Normalizer.normalize_data")
-@patch("app.extractors.extractor.Extractor.get_account_transactions")
+@patch("app.normalizers.normalizer.Normalizer.normalize_account")
+@patch("app.extractors.extractor.Extractor.iter_account_transactions")
 @patch("app.extractors.extractor.Extractor.get_account_balance")
 @patch("app.extractors.extractor.Extractor.get_account")
 @patch("app.clients.consents.Consents.get_consent")
 @patch("app.clients.clients.Clients.get_dynamic_client_token")
-@patch("app.core.cache.Cache.get_consent")
-@patch("app.core.cache.Cache.get_dynamic_client_token")
-def test_extract_data_full_flow(
+@patch("app.core.encrypted_cache.EncryptedCache.get_consent")
+@patch("app.core.encrypted_cache.EncryptedCache.get_dynamic_client_token")
+@pytest.mark.anyio
+async def test_extract_data_full_flow(
     mock_get_dynamic_cache,
     mock_get_consent_cache,
     mock_get_dynamic_token,
@@ -20,7 +42,7 @@ def test_extract_data_full_flow(
     mock_get_account,
     mock_get_balance,
     mock_get_transactions,
-    mock_normalize_data,
+    mock_normalize_account,
     mock_create_response,
     extract_request,
     response_data,
@@ -34,7 +56,7 @@ def test_extract_data_full_flow(
 
     mock_get_account.return_value = [{"id": "acc1"}]
     mock_get_balance.return_value = {"amount": 100.0, "currency": "BRL"}
-    mock_get_transactions.return_value = [
+    mock_get_transactions.side_effect = pages_of(
         {
             "id": "tx1",
             "transaction_type": "deposit",
@@ -44,12 +66,402 @@ def test_extract_data_full_flow(
             "transaction_description": "Salário",
             "transaction_date": "2025-07-12T12:00:00Z",
         }
-    ]
+    )
 
-    mock_normalize_data.return_value = normalized_data
+    mock_normalize_account.return_value = normalized_data
     mock_create_response.return_value = response_data
 
     service = ExtractFinancialDataService(extract_request)
-    result = service.extract_data()
+    result = await service.extract_data()
 
     assert result == response_data
+
+
+@patch("app.services.service.settings.account_fetch_concurrency", 2)
+@patch("app.extractors.extractor.Extractor.iter_account_transactions")
+@patch("app.extractors.extractor.Extractor.get_account_balance")
+@patch("app.extractors.extractor.Extractor.get_account")
+@patch("app.core.encrypted_cache.EncryptedCache.get_consent")
+@patch("app.core.encrypted_cache.EncryptedCache.get_dynamic_client_token")
+@pytest.mark.anyio
+async def test_extract_data_fetches_accounts_concurrently_in_order(
+    mock_get_dynamic_cache,
+    mock_get_consent_cache,
+    mock_get_account,
+    mock_get_balance,
+    mock_get_transactions,
+    extract_request,
+):
+    mock_get_dynamic_cache.return_value = "dynamic-token"
+    mock_get_consent_cache.return_value = ("consent-token", "consent-id")
+    mock_get_account.return_value = [
+        {"id": f"acc{i}", "account_type": "checking"} for i in range(4)
+    ]
+
+    in_flight = 0
+    peak_in_flight = 0
+
+    async def track(delay):
+        nonlocal in_flight, peak_in_flight
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        await asyncio.sleep(delay)
+        in_flight -= 1
+
+    async def fake_balance(consent_token, account_id):
+        await track(0.01)
+        return {"balance": 10.0, "currency": "BRL"}
+
+    async def fake_transactions(consent_token, account_id, *dates):
+        # Earlier accounts finish last, so ordering can't come for free
+        await track(0.04 - int(account_id[-1]) * 0.01)
+        yield []
+
+    mock_get_balance.side_effect = fake_balance
+    mock_get_transactions.side_effect = fake_transactions
+
+    result = await ExtractFinancialDataService(extract_request).extract_data()
+
+    assert [account.account_id for account in result.accounts] == [
+        "acc0",
+        "acc1",
+        "acc2",
+        "acc3",
+    ]
+    assert peak_in_flight == 2
+
+
+@patch("app.extractors.extractor.Extractor.iter_account_transactions")
+@patch("app.extractors.extractor.Extractor.get_account_balance")
+@patch("app.extractors.extractor.Extractor.get_account")
+@patch("app.core.encrypted_cache.EncryptedCache.get_consent")
+@patch("app.core.encrypted_cache.EncryptedCache.get_dynamic_client_token")
+@pytest.mark.anyio
+async def test_extract_data_propagates_account_errors(
+    mock_get_dynamic_cache,
+    mock_get_consent_cache,
+    mock_get_account,
+    mock_get_balance,
+    mock_get_transactions,
+    extract_request,
+):
+    mock_get_dynamic_cache.return_value = "dynamic-token"
+    mock_get_consent_cache.return_value = ("consent-token", "consent-id")
+    mock_get_account.return_value = [{"id": "acc1"}, {"id": "acc2"}]
+    mock_get_balance.return_value = {"balance": 10.0, "currency": "BRL"}
+
+    async def failing_transactions(consent_token, account_id, *dates):
+        raise HTTPException(status_code=404)
+        yield
+
+    mock_get_transactions.side_effect = failing_transactions
+
+    with pytest.raises(HTTPException):
+        await ExtractFinancialDataService(extract_request).extract_data()
+
+
+@patch("app.normalizers.normalizer.Normalizer._Normalizer__get_extraction_date")
+@patch("app.extractors.extractor.Extractor.iter_account_transactions")
+@patch("app.extractors.extractor.Extractor.get_account_balance")
+@patch("app.extractors.extractor.Extractor.get_account")
+@patch("app.core.encrypted_cache.EncryptedCache.get_consent")
+@patch("app.core.encrypted_cache.EncryptedCache.get_dynamic_client_token")
+@pytest.mark.anyio
+async def test_stream_data_yields_accounts_as_ready_then_summary(
+    mock_get_dynamic_cache,
+    mock_get_consent_cache,
+    mock_get_account,
+    mock_get_balance,
+    mock_get_transactions,
+    mock_extraction_date,
+    extract_request,
+    balance_data,
+    transactions_data,
+):
+    mock_get_dynamic_cache.return_value = "dynamic-token"
+    mock_get_consent_cache.return_value = ("consent-token", "consent-id")
+    mock_extraction_date.return_value = "2025-07-12T18:59:06.594641-03:00Z"
+    mock_get_account.return_value = [
+        {"id": "slow", "account_type": "checking"},
+        {"id": "fast", "account_type": "savings"},
+    ]
+    mock_get_balance.return_value = balance_data
+
+    async def fake_transactions(consent_token, account_id, *dates):
+        await asyncio.sleep(0.03 if account_id == "slow" else 0)
+        yield transactions_data[:1]
+        yield transactions_data[1:]
+
+    mock_get_transactions.side_effect = fake_transactions
+
+    records = await ExtractFinancialDataService(extract_request).stream_data()
+    records = [record async for record in records]
+
+    assert [record["type"] for record in records] == ["account", "account", "summary"]
+    assert [record["data"]["account_id"] for record in records[:2]] == [
+        "fast",
+        "slow",
+    ]
+    assert records[2]["data"]["user_document"] == extract_request.user_document_number
+    assert records[2]["data"]["summary"]["total_transactions"] == 4
+
+
+@patch("app.extractors.extractor.Extractor.get_account")
+@patch("app.clients.consents.Consents.get_consent")
+@patch("app.clients.clients.Clients.get_dynamic_client_token")
+@patch("app.core.encrypted_cache.EncryptedCache.get_consent")
+@patch("app.core.encrypted_cache.EncryptedCache.get_dynamic_client_token")
+@pytest.mark.anyio
+async def test_concurrent_cold_cache_misses_share_one_upstream_lookup(
+    mock_get_dynamic_cache,
+    mock_get_consent_cache,
+    mock_get_dynamic_token,
+    mock_get_consent,
+    mock_get_account,
+    extract_request,
+):
+    mock_get_dynamic_cache.return_value = None
+    mock_get_consent_cache.return_value = (None, None)
+
+    async def slow_dynamic_token(organization_id):
+        await asyncio.sleep(0.01)
+        return "dynamic-token"
+
+    async def slow_consent(user_document_number, token):
+        await asyncio.sleep(0.01)
+        return "consent-token", "consent-id"
+
+    mock_get_dynamic_token.side_effect = slow_dynamic_token
+    mock_get_consent.side_effect = slow_consent
+    mock_get_account.return_value = []
+
+    await asyncio.gather(
+        *[ExtractFinancialDataService(extract_request).extract_data() for _ in range(5)]
+    )
+
+    assert mock_get_dynamic_token.call_count == 1
+    assert mock_get_consent.call_count == 1
+
+
+@patch("app.services.service.settings.extraction_cache_enabled", True)
+@patch("app.extractors.extractor.Extractor.iter_account_transactions")
+@patch("app.extractors.extractor.Extractor.get_account_balance")
+@patch("app.extractors.extractor.Extractor.get_account")
+@patch("app.core.encrypted_cache.EncryptedCache.get_consent")
+@patch("app.core.encrypted_cache.EncryptedCache.get_dynamic_client_token")
+@pytest.mark.anyio
+async def test_extract_data_serves_repeat_calls_from_result_cache(
+    mock_get_dynamic_cache,
+    mock_get_consent_cache,
+    mock_get_account,
+    mock_get_balance,
+    mock_get_transactions,
+    extract_request,
+    balance_data,
+    transactions_data,
+):
+    cache.extraction_cache.clear()
+    mock_get_dynamic_cache.return_value = "dynamic-token"
+    mock_get_consent_cache.return_value = ("consent-token", "consent-id")
+    mock_get_account.return_value = [{"id": "acc1", "account_type": "checking"}]
+    mock_get_balance.return_value = balance_data
+    mock_get_transactions.side_effect = pages_of(*transactions_data)
+
+    first = await ExtractFinancialDataService(extract_request).extract_data()
+    second = await ExtractFinancialDataService(extract_request).extract_data()
+    refreshed = await ExtractFinancialDataService(extract_request).extract_data(
+        force_refresh=True
+    )
+
+    assert first.summary.cached is False
+    assert second.summary.cached is True
+    assert second.summary.cache_age_ms >= 0
+    assert second.accounts == first.accounts
+    assert refreshed.summary.cached is False
+    assert mock_get_account.call_count == 2
+    cache.extraction_cache.clear()
+
+
+@pytest.mark.parametrize("cache_enabled", [True, False])
+@patch("app.extractors.extractor.Extractor.iter_account_transactions")
+@patch("app.extractors.extractor.Extractor.get_account_balance")
+@patch("app.extractors.extractor.Extractor.get_account")
+@patch("app.core.encrypted_cache.EncryptedCache.get_consent")
+@patch("app.core.encrypted_cache.EncryptedCache.get_dynamic_client_token")
+@pytest.mark.anyio
+async def test_local_store_is_written_only_with_the_extraction_cache(
+    mock_get_dynamic_cache,
+    mock_get_consent_cache,
+    mock_get_account,
+    mock_get_balance,
+    mock_get_transactions,
+    cache_enabled,
+    extract_request,
+    balance_data,
+    transactions_data,
+):
+    cache.extraction_cache.clear()
+    mock_get_dynamic_cache.return_value = "dynamic-token"
+    mock_get_consent_cache.return_value = ("consent-token", "consent-id")
+    mock_get_account.return_value = [{"id": "acc1", "account_type": "checking"}]
+    mock_get_balance.return_value = balance_data
+    mock_get_transactions.side_effect = pages_of(*transactions_data)
+    store = MagicMock()
+    store.load_extraction.return_value = (None, None)
+
+    with patch.object(cache.get(), "store", store), patch(
+        "app.services.service.settings.extraction_cache_enabled", cache_enabled
+    ):
+        await ExtractFinancialDataService(extract_request).extract_data()
+
+    assert store.save_extraction.called is cache_enabled
+    cache.extraction_cache.clear()
+
+
+@patch("app.services.service.settings.partial_results_enabled", True)
+@patch("app.extractors.extractor.Extractor.iter_account_transactions")
+@patch("app.extractors.extractor.Extractor.get_account_balance")
+@patch("app.extractors.extractor.Extractor.get_account")
+@patch("app.core.encrypted_cache.EncryptedCache.get_consent")
+@patch("app.core.encrypted_cache.EncryptedCache.get_dynamic_client_token")
+@pytest.mark.anyio
+async def test_partial_results_report_failures_and_retry_only_them(
+    mock_get_dynamic_cache,
+    mock_get_consent_cache,
+    mock_get_account,
+    mock_get_balance,
+    mock_get_transactions,
+    extract_request,
+    balance_data,
+    transactions_data,
+):
+    cache.partial_result_cache.clear()
+    mock_get_dynamic_cache.return_value = "dynamic-token"
+    mock_get_consent_cache.return_value = ("consent-token", "consent-id")
+    mock_get_account.return_value = [
+        {"id": "acc1", "account_type": "checking"},
+        {"id": "acc2", "account_type": "savings"},
+    ]
+    mock_get_transactions.side_effect = pages_of(*transactions_data)
+
+    async def balance_failing_for_acc2(consent_token, account_id):
+        if account_id == "acc2":
+            raise HTTPException(status_code=500)
+        return balance_data
+
+    mock_get_balance.side_effect = balance_failing_for_acc2
+    first = await ExtractFinancialDataService(extract_request).extract_data()
+
+    assert [account.account_id for account in first.accounts] == ["acc1"]
+    assert first.summary.total_accounts == 2
+    assert [error.model_dump() for error in first.summary.errors] == [
+        {
+            "account_id": "acc2",
+            "status_code": 502,
+            "message": "External service error. Please try again or contact support.",
+        }
+    ]
+
+    mock_get_balance.reset_mock(side_effect=True)
+    mock_get_balance.return_value = balance_data
+    second = await ExtractFinancialDataService(extract_request).extract_data()
+
+    assert [account.account_id for account in second.accounts] == ["acc1", "acc2"]
+    assert second.summary.errors == []
+    mock_get_balance.assert_called_once_with("consent-token", "acc2")
+    assert (
+        await cache.get_partial_result(
+            extract_request.organization_id, extract_request.user_document_number
+        )
+        is None
+    )
+
+
+@pytest.mark.anyio
+async def test_extract_data_against_mock_upstream(extract_request):
+    upstream = create_mock_upstream(
+        UpstreamProfile(
+            accounts_per_user=2, transactions_per_account=25, page_size=10, latency_ms=0
+        )
+    )
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=upstream))
+    request = extract_request.model_copy(
+        update={"organization_id": "org-mock", "user_document_number": "mock-user"}
+    )
+
+    with patch.object(http_pool, "_get_client", return_value=client):
+        response = await ExtractFinancialDataService(request).extract_data()
+    await client.aclose()
+
+    assert response.summary.total_accounts == 2
+    assert response.summary.total_transactions == 50
+    assert [len(account.transactions) for account in response.accounts] == [25, 25]
+
+
+@patch("app.services.service.settings.extraction_cache_enabled", True)
+@pytest.mark.anyio
+async def test_filtered_extraction_narrows_accounts_and_dates(extract_request):
+    # Newest first, one hour apart from 2025-07-12 12:00: indexes 13-36 fall
+    # on 2025-07-11, so paging stops at page 4 instead of walking all 10
+    upstream = create_mock_upstream(
+        UpstreamProfile(
+            accounts_per_user=2,
+            transactions_per_account=100,
+            page_size=10,
+            latency_ms=0,
+        )
+    )
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=upstream))
+    request = extract_request.model_copy(
+        update={
+            "organization_id": "org-filtered",
+            "user_document_number": "filtered-user",
+            "account_types": ["checking"],
+            "date_from": date(2025, 7, 11),
+            "date_to": date(2025, 7, 11),
+        }
+    )
+    service = ExtractFinancialDataService(request)
+
+    with patch.object(http_pool, "_get_client", return_value=client):
+        response = await service.extract_data()
+    await client.aclose()
+
+    assert [account.account_type for account in response.accounts] == ["checking"]
+    assert response.summary.total_accounts == 1
+    assert response.summary.total_transactions == 24
+    assert service.progress.pages_fetched == 4
+    # A narrowed response must not be served to unfiltered requests
+    assert (await cache.get_extraction("org-filtered", "filtered-user"))[0] is None
+
+
+@patch("app.services.service.settings.summary_timings_enabled", True)
+@pytest.mark.anyio
+async def test_extract_data_reports_timing_breakdown(extract_request):
+    upstream = create_mock_upstream(
+        UpstreamProfile(
+            accounts_per_user=2, transactions_per_account=25, page_size=10, latency_ms=0
+        )
+    )
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=upstream))
+    request = extract_request.model_copy(
+        update={"organization_id": "org-timed", "user_document_number": "timed-user"}
+    )
+
+    with patch.object(http_pool, "_get_client", return_value=client):
+        response = await ExtractFinancialDataService(request).extract_data()
+    await client.aclose()
+
+    timings = response.summary.timings
+    assert set(timings.stages) == {
+        "dynamic_client",
+        "consent",
+        "accounts",
+        "balances",
+        "transactions",
+        "normalization",
+        "total",
+    }
+    assert timings.stages["balances"].count == 2
+    assert timings.upstream["GET /account/{id}/transactions/"].count == 6
+    assert timings.cache["consent"].misses == 1
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_in_flight_call():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def fetch_token():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "token"
+
+    results = await asyncio.gather(
+        *[single_flight.do("org123", fetch_token) for _ in range(10)]
+    )
+
+    assert results == ["token"] * 10
+    assert calls == 1
+    assert single_flight.in_flight() == 0
+
+    await single_flight.do("org123", fetch_token)
+    assert calls == 2
+
+
+@pytest.mark.anyio
+async def test_waiters_share_the_leader_error():
+    single_flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(
+        *[single_flight.do("org123", failing) for _ in range(3)],
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert single_flight.in_flight() == 0